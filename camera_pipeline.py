@@ -0,0 +1,169 @@
+#camera_pipeline.py
+import threading
+from dataclasses import dataclass
+from time import monotonic, sleep
+from typing import Any, Callable, Optional, Tuple
+from timebase import CLOCK
+
+
+class LatestSlot:
+    """Casilla que guarda solo el último valor publicado.
+
+    Publicar sobrescribe el valor anterior, así que los lectores nunca procesan
+    frames viejos en cola; ``wait_newer`` bloquea hasta que haya un valor más
+    nuevo que el último que vio el lector.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._value = None
+        self._closed = False
+
+    def put(self, value):
+        with self._cond:
+            self._seq += 1
+            self._value = value
+            self._cond.notify_all()
+
+    def latest(self) -> Tuple[int, Any]:
+        with self._cond:
+            return self._seq, self._value
+
+    def wait_newer(self, seq: int, timeout: Optional[float] = None) -> Tuple[int, Any]:
+        """Devuelve ``(seq, value)`` más nuevo que ``seq``, o el actual si vence el timeout"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or self._closed, timeout)
+            return self._seq, self._value
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+@dataclass
+class CapturedFrame:
+    """Frame leído de la cámara; ``captured_at`` está en el reloj común (timebase.CLOCK)"""
+    image: Any
+    captured_at: float
+
+
+@dataclass
+class ProcessedFrame:
+    image: Any
+    landmarks: Any
+    captured_at: float
+    processed_at: float
+    inference_time: float = 0.0
+
+    @property
+    def latency(self) -> float:
+        return self.processed_at - self.captured_at
+
+
+class CameraPipeline:
+    """Captura e inferencia de una cámara en hilos separados.
+
+    El hilo de captura lee continuamente y publica solo el último frame; el hilo
+    de inferencia toma siempre el frame más reciente disponible (descartando los
+    que llegaron mientras procesaba) y publica el resultado. Los consumidores
+    leen ``results`` sin bloquear a la cámara, así que la latencia entre captura
+    y visualización queda acotada aunque la inferencia se atrase.
+    ``on_processed(camera_id, ProcessedFrame)`` recibe cada resultado con sus
+    tiempos, p. ej. para ajustar el perfil de la cámara. Los landmarks llevan
+    como ``timestamp`` el instante de captura, no el de inferencia. Una
+    inferencia que termina después de ``stop`` se descarta sin llamar a nadie.
+    """
+
+    def __init__(self, camera_id, capture, process: Callable, on_landmarks: Optional[Callable] = None,
+                 on_processed: Optional[Callable] = None):
+        self.camera_id = camera_id
+        self.capture = capture
+        self.process = process
+        self.on_landmarks = on_landmarks
+        self.on_processed = on_processed
+        self._capture_size: Optional[Tuple[int, int]] = None
+        self.frames = LatestSlot()
+        self.results = LatestSlot()
+        self.captured = 0
+        self.processed = 0
+        self._running = False
+        self._threads = []
+
+    def start(self):
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name=f"capture-{self.camera_id}", daemon=True),
+            threading.Thread(target=self._inference_loop, name=f"inference-{self.camera_id}", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def request_capture_size(self, width: int, height: int):
+        """Pide una nueva resolución; se aplica desde el hilo de captura antes de la siguiente lectura"""
+        self._capture_size = (width, height)
+
+    def _capture_loop(self):
+        # OpenCV se importa con la primera cámara, no al importar el módulo
+        import cv2
+
+        while self._running:
+            if self._capture_size is not None:
+                width, height = self._capture_size
+                self._capture_size = None
+                self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            success, image = self.capture.read()
+            if not success:
+                sleep(0.01)
+                continue
+            self.captured += 1
+            self.frames.put(CapturedFrame(cv2.flip(image, 1), CLOCK.now()))
+
+    def _inference_loop(self):
+        seq = 0
+        while self._running:
+            seq, captured = self.frames.wait_newer(seq, timeout=0.5)
+            if captured is None or not self._running:
+                continue
+            try:
+                started_at = monotonic()
+                processed_image, landmarks = self.process(captured.image)
+                inference_time = monotonic() - started_at
+                if not self._running:
+                    break
+                if landmarks is not None:
+                    landmarks.timestamp = captured.captured_at
+                    if self.on_landmarks is not None:
+                        self.on_landmarks(self.camera_id, landmarks)
+            except Exception as e:
+                print(f"Error processing frame from camera {self.camera_id}: {e}")
+                continue
+            self.processed += 1
+            processed = ProcessedFrame(processed_image, landmarks, captured.captured_at, CLOCK.now(), inference_time)
+            self.results.put(processed)
+            if self.on_processed is not None:
+                try:
+                    self.on_processed(self.camera_id, processed)
+                except Exception as e:
+                    print(f"Error tuning camera {self.camera_id}: {e}")
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Espera a los hilos; devuelve True si ya terminaron"""
+        for thread in self._threads:
+            thread.join(timeout)
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def stop(self) -> bool:
+        """Detiene la cámara; devuelve False si la inferencia sigue en curso tras 2 s"""
+        self._running = False
+        self.frames.close()
+        self.results.close()
+        stopped = self.join(timeout=2.0)
+        self.capture.release()
+        return stopped
@@ -0,0 +1,162 @@
+#camera_tuning.py
+from collections import deque
+from dataclasses import dataclass
+from time import monotonic
+from typing import List, Optional
+
+START_PROFILE = 'balanced'
+
+
+@dataclass(frozen=True)
+class CameraProfile:
+    """Conjunto de ajustes de captura e inferencia de una cámara"""
+    name: str
+    width: int
+    height: int
+    model_complexity: int = 1
+    refine_face_landmarks: bool = False
+    every_n: int = 1
+    groups: Optional[frozenset] = None  # None: todos los grupos suscritos
+
+    def holistic_options(self) -> dict:
+        return {
+            'model_complexity': self.model_complexity,
+            'refine_face_landmarks': self.refine_face_landmarks,
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'width': self.width,
+            'height': self.height,
+            'model_complexity': self.model_complexity,
+            'refine_face_landmarks': self.refine_face_landmarks,
+            'every_n': self.every_n,
+            'groups': sorted(self.groups) if self.groups is not None else None,
+        }
+
+
+def default_profiles(width: int, height: int) -> List[CameraProfile]:
+    """Escalera de perfiles de mayor a menor costo a partir de la resolución configurada.
+
+    Todos usan ``model_complexity=1``, el único modelo de pose que viene en el
+    paquete de mediapipe (0 y 2 se descargan al crear el Holistic, desde el
+    hilo de inferencia); los escalones bajan el costo con la resolución, los
+    grupos extraídos y los frames inferidos.
+    """
+    return [
+        CameraProfile('quality', width, height, refine_face_landmarks=True),
+        CameraProfile('balanced', width, height),
+        CameraProfile('fast', width, height, groups=frozenset({'pose', 'left_hand', 'right_hand'})),
+        CameraProfile('reduced', width // 2, height // 2,
+                      groups=frozenset({'pose', 'left_hand', 'right_hand'})),
+        CameraProfile('minimal', width // 2, height // 2, every_n=2, groups=frozenset({'pose'})),
+    ]
+
+
+class TargetFpsController:
+    """Controlador por cámara que mueve el perfil por la escalera para sostener un FPS objetivo.
+
+    Recibe cada frame procesado con su tiempo de inferencia y cada ``window``
+    segundos evalúa la ventana: si los frames procesados por segundo quedan por
+    debajo del objetivo o la latencia captura→resultado supera el presupuesto,
+    baja un escalón; si hay margen de sobra (la inferencia usa menos de
+    ``headroom`` del intervalo objetivo) durante ``patience`` ventanas seguidas,
+    sube uno. Después de cada cambio espera una ventana completa antes de volver a
+    evaluar, para no oscilar mientras el modelo nuevo se estabiliza.
+    """
+
+    def __init__(self, profiles: List[CameraProfile], start: str = START_PROFILE, target_fps: float = 20.0,
+                 latency_budget: float = 0.15, window: float = 2.0, headroom: float = 0.5,
+                 patience: int = 3):
+        self.profiles = profiles
+        self.level = next((i for i, profile in enumerate(profiles) if profile.name == start), 0)
+        self.target_fps = target_fps
+        self.latency_budget = latency_budget
+        self.window = window
+        self.headroom = headroom
+        self.patience = patience
+        self.measured = {'fps': 0.0, 'latency': 0.0, 'inference': 0.0}
+        self._samples = deque()
+        self._window_start = monotonic()
+        self._settle_until = self._window_start + window
+        self._good_windows = 0
+        self._previous_level = self.level
+        self.unavailable = set()  # niveles cuyo perfil no pudo aplicarse
+
+    @property
+    def profile(self) -> CameraProfile:
+        return self.profiles[self.level]
+
+    def record(self, latency: float, inference_time: float) -> Optional[CameraProfile]:
+        """Agrega un frame procesado; devuelve el perfil nuevo si hay que cambiarlo"""
+        now = monotonic()
+        self._samples.append((latency, inference_time))
+        if now - self._window_start < self.window:
+            return None
+
+        elapsed = now - self._window_start
+        count = len(self._samples)
+        self.measured = {
+            'fps': count / elapsed,
+            'latency': sum(sample[0] for sample in self._samples) / count,
+            'inference': sum(sample[1] for sample in self._samples) / count,
+        }
+        self._samples.clear()
+        self._window_start = now
+        if now < self._settle_until:
+            return None
+        return self._decide(now)
+
+    def _decide(self, now: float) -> Optional[CameraProfile]:
+        measured = self.measured
+        # Un FPS bajo solo cuenta si la inferencia está ocupada casi todo el tiempo;
+        # si no, el límite es la cámara y bajar el perfil no ayudaría
+        busy = measured['inference'] * measured['fps']
+        overloaded = ((measured['fps'] < 0.9 * self.target_fps and busy > 0.8)
+                      or measured['latency'] > self.latency_budget)
+        # Fracción del tiempo que la inferencia ocuparía al FPS objetivo (los frames
+        # extrapolados cuentan con su costo casi nulo)
+        spare = measured['inference'] * self.target_fps < self.headroom
+
+        lower, higher = self._next_level(1), self._next_level(-1)
+        if overloaded and lower is not None:
+            self._good_windows = 0
+            return self._move(lower, now)
+        if not overloaded and spare and higher is not None:
+            self._good_windows += 1
+            if self._good_windows >= self.patience:
+                self._good_windows = 0
+                return self._move(higher, now)
+        else:
+            self._good_windows = 0
+        return None
+
+    def _next_level(self, step: int) -> Optional[int]:
+        """Siguiente nivel disponible hacia abajo (``step=1``) o hacia arriba (``step=-1``)"""
+        level = self.level + step
+        while 0 <= level < len(self.profiles):
+            if level not in self.unavailable:
+                return level
+            level += step
+        return None
+
+    def _move(self, level: int, now: float) -> CameraProfile:
+        self._previous_level, self.level = self.level, level
+        self._settle_until = now + self.window
+        return self.profile
+
+    def undo(self):
+        """El último perfil no pudo aplicarse: vuelve al anterior y no lo intenta de nuevo"""
+        self.unavailable.add(self.level)
+        self.level = self._previous_level
+
+    def status(self) -> dict:
+        return {
+            'profile': self.profile.to_dict(),
+            'target_fps': self.target_fps,
+            'latency_budget': self.latency_budget,
+            'fps': round(self.measured['fps'], 1),
+            'latency_ms': round(self.measured['latency'] * 1000, 1),
+            'inference_ms': round(self.measured['inference'] * 1000, 1),
+        }
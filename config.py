@@ -4,4 +4,22 @@ class Config:
     SECRET_KEY = 'your-secret-key-here'
     CAMERA_INDEX = 0
     CAMERA_WIDTH = 640
-    CAMERA_HEIGHT = 480
\ No newline at end of file
+    CAMERA_HEIGHT = 480
+    # Control automático del perfil de cada cámara (ver camera_tuning.py)
+    AUTO_TUNE = True
+    TARGET_FPS = 20
+    LATENCY_BUDGET = 0.15  # segundos entre captura y landmarks
+    HOLISTIC_POOL_SIZE = 1  # modelos calientes por configuración al arrancar
+    # Adquisición de EMG (ver emg_acquisition.py)
+    EMG_PORT = None  # p. ej. '/dev/ttyACM0'; también se toma de EMG_SOURCE
+    EMG_BAUDRATE = 115200
+    EMG_CHANNELS = 2
+    EMG_SAMPLE_RATE = 1000
+    EMG_DISPLAY_RATE = 20  # bloques por segundo hacia el navegador
+    EMG_RMS_WINDOW = 50  # muestras
+    EMG_FFT_SIZE = 512  # muestras por segmento de Welch (50% de solapamiento)
+    EMG_FATIGUE_WINDOW = 30  # segundos de historia para la tendencia de la frecuencia mediana
+    # Frames de historial por cliente que envía landmarks desde el navegador
+    INGEST_HISTORY_SIZE = 600
+    # Directorio de las sesiones grabadas desde la página (ver session_store.py)
+    RECORDINGS_DIR = 'recordings'
\ No newline at end of file
@@ -0,0 +1,270 @@
+#emg_acquisition.py
+import os
+import select
+import stat
+import threading
+import numpy as np
+from time import monotonic, sleep
+from typing import Dict, Optional
+from emg_features import EmgFeatures
+from timebase import CLOCK, ring_bisect
+
+
+class SerialSource:
+    """Puerto serie del Arduino; cada línea es ``v0,v1,...`` con una muestra por canal.
+
+    Usa pyserial. Sin pyserial solo acepta un pty o un FIFO (sustitutos del
+    dispositivo en pruebas), que se leen como archivo: un puerto real necesita
+    configurar la velocidad.
+    """
+
+    def __init__(self, port: str, baudrate: int = 115200, timeout: float = 0.1):
+        self.port = port
+        self.timeout = timeout
+        self._serial = None
+        self._fd = None
+        try:
+            import serial
+        except ImportError:
+            if not self._is_pty_or_fifo(port):
+                raise OSError(f"pyserial is required to read the serial port {port} (pip install pyserial)")
+            print(f"pyserial is not installed; reading {port} as a plain file")
+            self._fd = os.open(port, os.O_RDONLY | os.O_NOCTTY)
+        else:
+            self._serial = serial.Serial(port, baudrate, timeout=timeout)
+
+    @staticmethod
+    def _is_pty_or_fifo(port: str) -> bool:
+        return stat.S_ISFIFO(os.stat(port).st_mode) or os.path.realpath(port).startswith('/dev/pts/')
+
+    def read(self) -> bytes:
+        if self._serial is not None:
+            return self._serial.read(max(1, self._serial.in_waiting))
+        ready, _, _ = select.select([self._fd], [], [], self.timeout)
+        return os.read(self._fd, 65536) if ready else b''
+
+    def close(self):
+        if self._serial is not None:
+            self._serial.close()
+        elif self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class FileSource:
+    """Reproduce un CSV grabado (una muestra por línea) a la frecuencia de muestreo, en bucle"""
+
+    def __init__(self, path: str, sample_rate: float, chunk: float = 0.02, loop: bool = True):
+        with open(path, 'rb') as f:
+            self.lines = [line.strip() + b'\n' for line in f if line.strip()]
+        self.sample_rate = sample_rate
+        self.chunk = chunk
+        self.loop = loop
+        self._position = 0
+        self._started = None
+        self._sent = 0
+
+    def read(self) -> bytes:
+        if self._started is None:
+            self._started = monotonic()
+        sleep(self.chunk)
+        due = int((monotonic() - self._started) * self.sample_rate) - self._sent
+        lines = []
+        while due > 0 and self.lines:
+            if self._position >= len(self.lines):
+                if not self.loop:
+                    break
+                self._position = 0
+            batch = self.lines[self._position:self._position + due]
+            self._position += len(batch)
+            due -= len(batch)
+            lines.extend(batch)
+        self._sent += len(lines)
+        return b''.join(lines)
+
+    def close(self):
+        pass
+
+
+def open_source(spec: str, sample_rate: float, baudrate: int = 115200):
+    """``file:ruta.csv`` reproduce una grabación; cualquier otra cosa es un puerto serie o pty"""
+    if spec.startswith('file:'):
+        return FileSource(spec[len('file:'):], sample_rate)
+    return SerialSource(spec, baudrate)
+
+
+def parse_samples(data: bytes, channels: int) -> np.ndarray:
+    """Convierte líneas CSV completas a un bloque ``(channels, n)``; descarta las líneas mal formadas"""
+    lines = [line for line in data.replace(b'\r', b'').split(b'\n') if line.count(b',') == channels - 1]
+    if not lines:
+        return np.empty((channels, 0))
+    try:
+        values = np.array(b','.join(lines).split(b','), dtype=float)
+    except ValueError:
+        rows = []
+        for line in lines:
+            try:
+                rows.append([float(value) for value in line.split(b',')])
+            except ValueError:
+                continue
+        values = np.array(rows, dtype=float).reshape(-1)
+    return values.reshape(-1, channels).T
+
+
+class EmgAcquisition:
+    """Adquisición de EMG en un hilo propio con procesamiento por bloques.
+
+    El hilo lee lo que haya disponible en la fuente, lo convierte en un bloque
+    ``(channels, n)`` y lo pasa a ``EmgFeatures``, que guarda muestras y
+    envolvente en buffers circulares y actualiza el espectro de forma
+    incremental. ``drain`` entrega juntas las muestras llegadas desde la
+    llamada anterior, a la tasa de refresco de la página, con las métricas
+    espectrales y de fatiga actuales; así el navegador recibe unos pocos
+    mensajes por segundo en lugar de uno por muestra. Si nadie llama a
+    ``drain`` la memoria no crece: las muestras más viejas que el buffer se
+    pierden.
+
+    Cada bloque se sella con el reloj común (timebase.CLOCK) al leerlo: el
+    sello corresponde a su última muestra y las anteriores se ubican hacia
+    atrás a la frecuencia de muestreo. Con esas anclas ``sample_time`` y
+    ``window`` pasan de número de muestra a tiempo y viceversa por bisección,
+    en la misma escala que los frames de las cámaras.
+    """
+
+    def __init__(self, source, channels: int = 2, sample_rate: float = 1000.0, **feature_options):
+        self.source = source
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.features = EmgFeatures(channels, sample_rate, **feature_options)
+        self.dropped_lines = 0
+        self.skipped = 0
+        self._drained = 0
+        # Anclas (tiempo, muestras acumuladas) de cada bloque, tantas como muestras caben en el buffer
+        capacity = self.features.samples.capacity
+        self._anchor_time = np.zeros(capacity)
+        self._anchor_end = np.zeros(capacity, dtype=np.int64)
+        self._anchor_head = 0
+        self._anchor_count = 0
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, name="emg-acquisition", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.source.close()
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def _read_loop(self):
+        partial = b''
+        while self._running:
+            try:
+                data = self.source.read()
+                stamp = CLOCK.now()
+            except Exception as e:
+                print(f"Error reading EMG source: {e}")
+                sleep(0.5)
+                continue
+            if not data:
+                continue
+            data = partial + data
+            end = data.rfind(b'\n')
+            if end < 0:
+                partial = data
+                continue
+            partial = data[end + 1:]
+            block = parse_samples(data[:end], self.channels)
+            self.dropped_lines += data[:end].count(b'\n') + 1 - block.shape[1]
+            if block.shape[1]:
+                self.add_block(block, stamp)
+
+    @property
+    def samples(self) -> int:
+        return self.features.samples.count
+
+    def add_block(self, block: np.ndarray, stamp: Optional[float] = None):
+        """Agrega un bloque ``(channels, n)`` de muestras ya convertidas; ``stamp`` es el tiempo de su última muestra"""
+        stamp = CLOCK.now() if stamp is None else stamp
+        with self._lock:
+            self.features.add(block)
+            capacity = len(self._anchor_time)
+            if self._anchor_count:
+                # Los sellos deben crecer aunque la lectura llegue con jitter
+                stamp = max(stamp, self._anchor_time[(self._anchor_head - 1) % capacity])
+            self._anchor_time[self._anchor_head] = stamp
+            self._anchor_end[self._anchor_head] = self.features.samples.count
+            self._anchor_head = (self._anchor_head + 1) % capacity
+            self._anchor_count = min(self._anchor_count + 1, capacity)
+
+    def _anchor(self, values: np.ndarray, value: float, right: bool = False) -> int:
+        position = ring_bisect(values, self._anchor_head, self._anchor_count, value, right)
+        position = min(position, self._anchor_count - 1)
+        return (self._anchor_head - self._anchor_count + position) % len(values)
+
+    def sample_time(self, index: int) -> float:
+        """Tiempo en el reloj común de la muestra número ``index``"""
+        if not self._anchor_count:
+            return index / self.sample_rate
+        slot = self._anchor(self._anchor_end, index, right=True)
+        return self._anchor_time[slot] - (self._anchor_end[slot] - 1 - index) / self.sample_rate
+
+    def sample_index(self, t: float) -> float:
+        """Número de muestra (fraccionario) correspondiente al tiempo ``t``"""
+        if not self._anchor_count:
+            return t * self.sample_rate
+        slot = self._anchor(self._anchor_time, t)
+        return self._anchor_end[slot] - 1 - (self._anchor_time[slot] - t) * self.sample_rate
+
+    def window(self, t0: float, t1: float) -> Dict[str, np.ndarray]:
+        """Muestras y envolvente retenidas con tiempo en ``[t0, t1]``, con el tiempo de cada muestra"""
+        with self._lock:
+            ring = self.features.samples
+            start = min(max(int(np.ceil(self.sample_index(t0))), ring.oldest), ring.count)
+            stop = min(max(int(np.floor(self.sample_index(t1))) + 1, start), ring.count)
+            return {
+                'time': self.sample_time(start) + np.arange(stop - start) / self.sample_rate,
+                'samples': ring.range(start, stop),
+                'envelope': self.features.envelope.range(start, stop),
+            }
+
+    def drain(self) -> Optional[Dict]:
+        """Muestras y envolvente llegadas desde la última llamada, con las métricas espectrales actuales"""
+        with self._lock:
+            features = self.features
+            stop = features.samples.count
+            if stop == self._drained:
+                return None
+            start = max(self._drained, features.samples.oldest)
+            self.skipped += start - self._drained
+            self._drained = stop
+            block = features.samples.range(start, stop)
+            envelope = features.envelope.range(start, stop)
+            summary = features.summary()
+            t0 = self.sample_time(start)
+        return {
+            't0': t0,
+            'sample_rate': self.sample_rate,
+            'samples': np.round(block, 4).tolist(),
+            'envelope': np.round(envelope, 4).tolist(),
+            **summary,
+        }
+
+    def stats(self) -> dict:
+        return {
+            'running': self._running,
+            'channels': self.channels,
+            'sample_rate': self.sample_rate,
+            'samples': self.samples,
+            'dropped_lines': self.dropped_lines,
+            'skipped_samples': self.skipped,
+            'spectrum_updates': self.features.updates,
+        }
@@ -0,0 +1,181 @@
+#emg_features.py
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+class SampleRing:
+    """Buffer circular preasignado ``(channels, capacity)`` indexado por número absoluto de muestra"""
+
+    def __init__(self, channels: int, capacity: int):
+        self.data = np.zeros((channels, capacity))
+        self.capacity = capacity
+        self.count = 0
+
+    def extend(self, block: np.ndarray):
+        n = block.shape[1]
+        if n >= self.capacity:
+            block = block[:, -self.capacity:]
+        start = (self.count + n - block.shape[1]) % self.capacity
+        first = min(block.shape[1], self.capacity - start)
+        self.data[:, start:start + first] = block[:, :first]
+        self.data[:, :block.shape[1] - first] = block[:, first:]
+        self.count += n
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.count - self.capacity)
+
+    def range(self, start: int, stop: int) -> np.ndarray:
+        """Copia de las muestras ``[start, stop)``; ``start`` se recorta a la más vieja disponible"""
+        start = max(start, self.oldest)
+        if stop <= start:
+            return np.empty((self.data.shape[0], 0))
+        first, last = start % self.capacity, (stop - 1) % self.capacity + 1
+        if first < last:
+            return self.data[:, first:last].copy()
+        return np.concatenate((self.data[:, first:], self.data[:, :last]), axis=1)
+
+
+def median_frequency(freqs: np.ndarray, power: np.ndarray) -> np.ndarray:
+    """Frecuencia que divide la potencia de cada canal en dos mitades iguales"""
+    cumulative = np.cumsum(power, axis=1)
+    index = np.argmax(cumulative >= cumulative[:, -1:] / 2, axis=1)
+    return np.where(cumulative[:, -1] > 0, freqs[index], 0.0)
+
+
+def mean_frequency(freqs: np.ndarray, power: np.ndarray) -> np.ndarray:
+    total = power.sum(axis=1)
+    return np.divide(power @ freqs, total, out=np.zeros_like(total), where=total > 0)
+
+
+class EmgFeatures:
+    """Métricas de EMG en ventana deslizante con costo constante por muestra.
+
+    - Envolvente RMS: suma acumulada de cuadrados; cada muestra suma su
+      cuadrado y resta el de la que sale de la ventana, sin volver a recorrerla.
+    - Espectro: Welch sobre segmentos de ``fft_size`` con solapamiento; cada
+      segmento nuevo se transforma una sola vez y su periodograma entra a una
+      suma móvil de los últimos ``segments``, de la que salen la frecuencia
+      media y la mediana.
+    - Fatiga: la mediana de cada actualización se guarda con su tiempo y la
+      pendiente (Hz/s) es una regresión lineal sobre los últimos
+      ``fatigue_window`` segundos; ``fatigue_index`` es la mediana actual
+      relativa a la de referencia (las primeras ``baseline_updates``).
+
+    La memoria queda acotada: un buffer circular de muestras y uno de
+    periodogramas, ambos preasignados.
+    """
+
+    def __init__(self, channels: int, sample_rate: float, rms_window: int = 50, fft_size: int = 512,
+                 overlap: float = 0.5, segments: int = 8, fatigue_window: float = 30.0,
+                 baseline_updates: int = 4, capacity: Optional[int] = None):
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.rms_window = rms_window
+        self.fft_size = fft_size
+        self.hop = max(1, int(fft_size * (1.0 - overlap)))
+        self.segments = segments
+        # Lo que ocupa una ventana de Welch completa, más dos segundos para que drain() lea atrasado
+        span = max(fft_size + segments * self.hop, rms_window)
+        self.samples = SampleRing(channels, capacity or span + int(sample_rate * 2))
+        self.envelope = SampleRing(channels, self.samples.capacity)
+        self.frequencies = np.fft.rfftfreq(fft_size, 1.0 / sample_rate)
+        self._taper = np.hanning(fft_size)
+        # Normalización de Welch: densidad espectral de potencia en unidades²/Hz
+        self._scale = 2.0 / (sample_rate * (self._taper ** 2).sum())
+        self._periodograms = np.zeros((segments, channels, len(self.frequencies)))
+        self._power_sum = np.zeros((channels, len(self.frequencies)))
+        self._filled = 0
+        self._next_segment = fft_size
+        self.updates = 0
+        self.mean_frequency = np.zeros(channels)
+        self.median_frequency = np.zeros(channels)
+        history = max(2, int(fatigue_window * sample_rate / self.hop) + 1)
+        self._trend_t = np.zeros(history)
+        self._trend_mdf = np.zeros((channels, history))
+        self._trend_count = 0
+        self._baseline_updates = baseline_updates
+        self._baseline_sum = np.zeros(channels)
+
+    def add(self, block: np.ndarray) -> np.ndarray:
+        """Agrega un bloque ``(channels, n)`` y devuelve su envolvente RMS"""
+        start = self.samples.count
+        tail = self.samples.range(start - self.rms_window, start)
+        tail = np.concatenate((np.zeros((self.channels, self.rms_window - tail.shape[1])), tail), axis=1)
+        squares = np.concatenate((tail, block), axis=1) ** 2
+        # La suma de la ventana previa se recalcula desde la cola (O(ventana) por bloque, no por muestra)
+        # para que el error de redondeo de la suma móvil no se acumule entre bloques
+        running = squares[:, :self.rms_window].sum(axis=1, keepdims=True)
+        running = running + np.cumsum(squares[:, self.rms_window:] - squares[:, :-self.rms_window], axis=1)
+        count = np.minimum(np.arange(start + 1, start + block.shape[1] + 1), self.rms_window)
+        envelope = np.sqrt(np.maximum(running, 0.0) / count)
+
+        self.samples.extend(block)
+        self.envelope.extend(envelope)
+        self._update_spectrum()
+        return envelope
+
+    def _update_spectrum(self):
+        ready = (self.samples.count - self._next_segment) // self.hop + 1
+        if ready <= 0:
+            return
+        # Si llegó más de una ventana de Welch de golpe, solo importan los últimos segmentos
+        skipped = max(0, ready - self.segments)
+        self._next_segment += skipped * self.hop
+        ready -= skipped
+        ends = self._next_segment + self.hop * np.arange(ready)
+        frames = np.stack([self.samples.range(end - self.fft_size, end) for end in ends], axis=1)
+        frames -= frames.mean(axis=2, keepdims=True)
+        power = np.abs(np.fft.rfft(frames * self._taper, axis=2)) ** 2 * self._scale
+        for segment in range(ready):
+            slot = self.updates % self.segments
+            if self._filled == self.segments:
+                self._power_sum -= self._periodograms[slot]
+            else:
+                self._filled += 1
+            self._periodograms[slot] = power[:, segment]
+            self._power_sum += power[:, segment]
+            self.updates += 1
+            if self.updates % self.segments == 0:
+                # Recalcular la suma cada vuelta del buffer evita que se acumule error de redondeo
+                self._power_sum = self._periodograms.sum(axis=0)
+        self._next_segment = int(ends[-1]) + self.hop
+
+        spectrum = self.spectrum
+        self.mean_frequency = mean_frequency(self.frequencies, spectrum)
+        self.median_frequency = median_frequency(self.frequencies, spectrum)
+        slot = self._trend_count % len(self._trend_t)
+        self._trend_t[slot] = (self._next_segment - self.hop) / self.sample_rate
+        self._trend_mdf[:, slot] = self.median_frequency
+        self._trend_count += 1
+        if self._trend_count <= self._baseline_updates:
+            self._baseline_sum += self.median_frequency
+
+    @property
+    def spectrum(self) -> np.ndarray:
+        """Densidad espectral de Welch promedio de los últimos segmentos, ``(channels, bins)``"""
+        return self._power_sum / max(self._filled, 1)
+
+    def fatigue(self) -> Tuple[np.ndarray, np.ndarray]:
+        """``(pendiente de la mediana en Hz/s, mediana actual / mediana de referencia)`` por canal"""
+        points = min(self._trend_count, len(self._trend_t))
+        if points < 2:
+            return np.zeros(self.channels), np.ones(self.channels)
+        t = self._trend_t[:points] if points < len(self._trend_t) else self._trend_t
+        mdf = self._trend_mdf[:, :points] if points < len(self._trend_t) else self._trend_mdf
+        dt = t - t.mean()
+        slope = (mdf - mdf.mean(axis=1, keepdims=True)) @ dt / max((dt ** 2).sum(), 1e-12)
+        baseline = self._baseline_sum / min(self._trend_count, self._baseline_updates)
+        index = np.divide(self.median_frequency, baseline, out=np.ones(self.channels), where=baseline > 0)
+        return slope, index
+
+    def summary(self) -> Dict:
+        slope, index = self.fatigue()
+        return {
+            'frequencies': np.round(self.frequencies, 2).tolist(),
+            'spectrum': self.spectrum.tolist(),
+            'mean_frequency': np.round(self.mean_frequency, 2).tolist(),
+            'median_frequency': np.round(self.median_frequency, 2).tolist(),
+            'fatigue_slope': np.round(slope, 4).tolist(),
+            'fatigue_index': np.round(index, 4).tolist(),
+        }
@@ -0,0 +1,152 @@
+#emit_scheduler.py
+import threading
+from time import monotonic
+from typing import Callable, Dict, Optional, Tuple
+
+
+class ClientChannel:
+    """Estado de envío de un cliente en una sala: un único payload pendiente y como máximo uno en vuelo"""
+
+    def __init__(self, sid: str, room: str, encode: Callable, max_rate: float):
+        self.sid = sid
+        self.room = room
+        self.encode = encode
+        self.max_rate = max_rate
+        self.pending = None
+        self.in_flight_since: Optional[float] = None
+        self.last_sent = 0.0
+        self.sent = 0
+        self.acked = 0
+        self.dropped = 0
+        self.timeouts = 0
+
+    def stats(self) -> dict:
+        return {
+            'queue_depth': int(self.pending is not None) + int(self.in_flight_since is not None),
+            'max_rate': self.max_rate,
+            'sent': self.sent,
+            'acked': self.acked,
+            'dropped': self.dropped,
+            'ack_timeouts': self.timeouts,
+        }
+
+
+class EmitScheduler:
+    """Envía a cada cliente solo el payload más reciente de cada sala, respetando su tasa máxima.
+
+    Los clientes se suscriben a salas (p. ej. una cámara o un tipo de dato) y
+    ``offer`` entrega un payload solo a los miembros de esa sala. Cada par
+    (cliente, sala) tiene su propio canal: un payload nuevo reemplaza al
+    pendiente (el anterior se cuenta como descartado) en lugar de encolarlo. Un hilo de fondo envía cuando
+    pasó ``1 / max_rate`` desde el último envío y el cliente confirmó (ack) el
+    anterior, o venció ``ack_timeout``; así un navegador lento nunca acumula
+    mensajes en el servidor.
+    """
+
+    def __init__(self, socketio, ack_timeout: float = 1.0, tick: float = 0.005):
+        self.socketio = socketio
+        self.ack_timeout = ack_timeout
+        self.tick = tick
+        self.channels: Dict[Tuple[str, str], ClientChannel] = {}
+        self._rooms: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._task = None
+
+    def join(self, sid: str, room: str, encode: Callable, max_rate: float = 30.0):
+        """Suscribe un cliente a una sala; ``encode(update)`` devuelve ``(event, *args)`` para él"""
+        with self._lock:
+            self.channels[(sid, room)] = ClientChannel(sid, room, encode, max_rate)
+            self._rooms.setdefault(room, set()).add(sid)
+        if self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+
+    def leave(self, sid: str, room: str):
+        with self._lock:
+            self.channels.pop((sid, room), None)
+            members = self._rooms.get(room)
+            if members is not None:
+                members.discard(sid)
+                if not members:
+                    del self._rooms[room]
+
+    def remove_client(self, sid: str):
+        for room in self.client_rooms(sid):
+            self.leave(sid, room)
+
+    def client_rooms(self, sid: str) -> list:
+        with self._lock:
+            return [room for (channel_sid, room) in self.channels if channel_sid == sid]
+
+    def has_members(self, room: str) -> bool:
+        return bool(self._rooms.get(room))
+
+    def configure(self, sid: str, room: str, encode: Optional[Callable] = None,
+                  max_rate: Optional[float] = None):
+        with self._lock:
+            channel = self.channels.get((sid, room))
+            if channel is None:
+                return
+            if encode is not None:
+                channel.encode = encode
+            if max_rate is not None:
+                channel.max_rate = max_rate
+
+    def offer(self, room: str, update):
+        """Deja ``update`` como el payload pendiente de cada miembro de la sala"""
+        with self._lock:
+            for sid in self._rooms.get(room, ()):
+                channel = self.channels[(sid, room)]
+                if channel.pending is not None:
+                    channel.dropped += 1
+                channel.pending = update
+
+    def stats(self) -> Dict[str, Dict[str, dict]]:
+        with self._lock:
+            stats: Dict[str, Dict[str, dict]] = {}
+            for (sid, room), channel in self.channels.items():
+                stats.setdefault(sid, {})[room] = channel.stats()
+            return stats
+
+    def _ready(self, channel: ClientChannel, now: float) -> bool:
+        if channel.pending is None or now - channel.last_sent < 1.0 / channel.max_rate:
+            return False
+        if channel.in_flight_since is not None:
+            if now - channel.in_flight_since < self.ack_timeout:
+                return False
+            channel.timeouts += 1
+        return True
+
+    def _make_ack(self, channel: ClientChannel, sent_at: float):
+        def ack(*args):
+            # Ignorar acks tardíos de un envío que ya se dio por vencido
+            if channel.in_flight_since == sent_at:
+                channel.in_flight_since = None
+                channel.acked += 1
+        return ack
+
+    def _run(self):
+        while True:
+            now = monotonic()
+            with self._lock:
+                ready = []
+                for channel in self.channels.values():
+                    if self._ready(channel, now):
+                        ready.append((channel, channel.pending))
+                        channel.pending = None
+                        channel.in_flight_since = now
+                        channel.last_sent = now
+
+            for channel, update in ready:
+                try:
+                    event, *args = channel.encode(update)
+                    sent_at = channel.last_sent
+                    # Varios argumentos viajan como tupla: Server.emit toma el tercero posicional como ``to``
+                    data = args[0] if len(args) == 1 else tuple(args)
+                    self.socketio.emit(event, data, to=channel.sid,
+                                       callback=self._make_ack(channel, sent_at))
+                    channel.sent += 1
+                except Exception as e:
+                    channel.in_flight_since = None
+                    print(f"Error emitting {channel.room} to {channel.sid}: {e}")
+
+            self.socketio.sleep(self.tick)
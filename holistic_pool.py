@@ -0,0 +1,124 @@
+#holistic_pool.py
+import threading
+import numpy as np
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+WARMUP_SHAPE = (480, 640, 3)
+
+
+def warm_up(holistic, shape=WARMUP_SHAPE):
+    """Corre una inferencia sobre un frame negro para que la primera real no pague la carga del modelo"""
+    holistic.process(np.zeros(shape, dtype=np.uint8))
+
+
+class HolisticPool:
+    """Instancias de Holistic precargadas y precalentadas, agrupadas por configuración.
+
+    ``acquire(options)`` entrega una instancia ociosa con esas opciones (o crea
+    una si no hay) y ``release`` la reinicia y la vuelve a calentar en segundo
+    plano antes de devolverla al pool, así el siguiente ``start_camera`` no
+    paga la carga del modelo ni la primera inferencia. ``factory(options)``
+    crea una instancia y ``warm(instance)`` la calienta; para las que se
+    calientan solas (p. ej. un ProcessInference) ``warm`` puede ser None.
+    """
+
+    def __init__(self, factory: Callable[[dict], Any], warm: Optional[Callable[[Any], None]] = warm_up,
+                 max_idle: int = 2):
+        self.factory = factory
+        self.warm = warm
+        self.max_idle = max_idle
+        self.hits = 0
+        self.misses = 0
+        self.prewarm_time: Optional[float] = None
+        self._idle: Dict[tuple, List[Any]] = {}
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(options: dict) -> tuple:
+        return tuple(sorted(options.items()))
+
+    def _create(self, options: dict):
+        instance = self.factory(dict(options))
+        if self.warm is not None:
+            self.warm(instance)
+        return instance
+
+    def acquire(self, options: dict):
+        with self._lock:
+            idle = self._idle.get(self.key(options))
+            if idle:
+                self.hits += 1
+                return idle.pop()
+            self.misses += 1
+        return self._create(options)
+
+    def release(self, instance, options: dict):
+        """Devuelve una instancia; se reinicia y calienta en un hilo aparte para no frenar al que la suelta"""
+        if self._closed:
+            instance.close()
+            return
+        threading.Thread(target=self._recycle, args=(instance, dict(options)),
+                         name="holistic-pool-recycle", daemon=True).start()
+
+    def _recycle(self, instance, options: dict):
+        try:
+            instance.reset()
+            if self.warm is not None:
+                self.warm(instance)
+        except Exception as e:
+            print(f"Error recycling Holistic instance: {e}")
+            instance.close()
+            return
+        self._put(instance, options)
+
+    def _put(self, instance, options: dict) -> bool:
+        with self._lock:
+            idle = self._idle.setdefault(self.key(options), [])
+            if not self._closed and len(idle) < self.max_idle:
+                idle.append(instance)
+                return True
+        instance.close()
+        return False
+
+    def prewarm(self, options_list: Iterable[dict], count: int = 1):
+        """Crea y calienta hasta ``count`` instancias ociosas por configuración (bloquea)"""
+        started = monotonic()
+        for options in options_list:
+            while True:
+                with self._lock:
+                    if len(self._idle.get(self.key(options), [])) >= min(count, self.max_idle):
+                        break
+                try:
+                    instance = self._create(options)
+                except Exception as e:
+                    print(f"Error pre-warming Holistic instance: {e}")
+                    break
+                if not self._put(instance, options):
+                    break
+        self.prewarm_time = monotonic() - started
+
+    def prewarm_async(self, options_list: Iterable[dict], count: int = 1) -> threading.Thread:
+        thread = threading.Thread(target=self.prewarm, args=(list(options_list), count),
+                                  name="holistic-pool-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """Cierra las instancias ociosas; las que se devuelvan después se cierran al llegar"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, {}
+        for instances in idle.values():
+            for instance in instances:
+                instance.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'idle': {str(dict(key)): len(instances) for key, instances in self._idle.items()},
+                'hits': self.hits,
+                'misses': self.misses,
+                'prewarm_time': self.prewarm_time,
+            }
@@ -0,0 +1,317 @@
+#inference_workers.py
+import multiprocessing as mp
+import threading
+import numpy as np
+from multiprocessing import shared_memory
+from time import monotonic
+from typing import Optional, Tuple
+from landmarks import LandmarkFrame, N_LANDMARKS
+from holistic_pool import warm_up
+
+FRAME_SLOTS = 2
+
+
+class SharedRing:
+    """Arreglo ``(slots, *shape)`` en memoria compartida que dos procesos ven sin copiarlo"""
+
+    def __init__(self, slots: int, shape: Tuple[int, ...], dtype, name: Optional[str] = None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray((slots,) + self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def spec(self) -> tuple:
+        """Datos para adjuntarse a este anillo desde otro proceso"""
+        return self.slots, self.shape, self.dtype.str, self.name
+
+    @classmethod
+    def attach(cls, spec: tuple) -> 'SharedRing':
+        slots, shape, dtype, name = spec
+        return cls(slots, shape, dtype, name=name)
+
+    def close(self, unlink: bool = False):
+        self.array = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _inference_worker(conn, result_specs, holistic_kwargs, enabled_groups):
+    """Bucle del proceso hijo: un modelo Holistic propio, frames y resultados por memoria compartida"""
+    from multicamera_holistic import MultiCameraHolisticBiomechanics
+
+    biomech = MultiCameraHolisticBiomechanics()
+    biomech.set_enabled_groups(enabled_groups)
+    holistic = biomech.mp_holistic.Holistic(**holistic_kwargs)
+    warm_up(holistic)
+    data_ring = SharedRing.attach(result_specs[0])
+    present_ring = SharedRing.attach(result_specs[1])
+    bounds_ring = SharedRing.attach(result_specs[2])
+    frame_ring = None
+
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            kind, payload = message
+            if kind == 'frames':
+                if frame_ring is not None:
+                    frame_ring.close()
+                frame_ring = SharedRing.attach(payload)
+            elif kind == 'groups':
+                biomech.set_enabled_groups(payload)
+            elif kind == 'reset':
+                holistic.reset()
+                warm_up(holistic)
+            elif kind == 'process':
+                slot, height, width = payload
+                try:
+                    _, landmarks = biomech.process_frame(frame_ring.array[slot, :height, :width], holistic)
+                except Exception as e:
+                    conn.send(('error', str(e)))
+                    continue
+                if landmarks is None:
+                    conn.send(('empty', slot))
+                    continue
+                data_ring.array[slot] = landmarks.data
+                present_ring.array[slot] = landmarks.present
+                bounds_ring.array[slot] = landmarks.bounds
+                conn.send(('landmarks', slot))
+    finally:
+        holistic.close()
+        if frame_ring is not None:
+            frame_ring.close()
+        data_ring.close()
+        present_ring.close()
+        bounds_ring.close()
+        conn.close()
+
+
+class ProcessInference:
+    """Ejecuta el modelo Holistic de una cámara en un proceso aparte.
+
+    Los frames se escriben en un anillo de memoria compartida y el proceso hijo
+    devuelve los landmarks en otro; por el pipe solo viajan índices de casilla
+    y el tamaño del frame (los recortes de ROI ocupan la esquina de la casilla).
+    Así cada cámara infiere en su propio núcleo sin competir por el GIL con la
+    captura, la codificación JPEG y Socket.IO. Se usa como ``process`` de un
+    CameraPipeline: ``process(image) -> (image, LandmarkFrame | None)``. El hijo
+    calienta el modelo al arrancar y tras ``reset``, así que puede vivir en un
+    HolisticPool como una instancia de Holistic más.
+    """
+
+    def __init__(self, name, enabled_groups, holistic_kwargs: Optional[dict] = None,
+                 slots: int = FRAME_SLOTS):
+        self.name = name
+        self.slots = slots
+        self.next_slot = 0
+        self.frame_ring: Optional[SharedRing] = None
+        self.data_ring = SharedRing(slots, (N_LANDMARKS, 4), np.float32)
+        self.present_ring = SharedRing(slots, (N_LANDMARKS,), np.bool_)
+        self.bounds_ring = SharedRing(slots, (4,), np.float32)
+        self._send_lock = threading.Lock()
+
+        # spawn: el hijo no hereda hilos ni el estado de MediaPipe del servidor
+        context = mp.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        self.process_handle = context.Process(
+            target=_inference_worker,
+            args=(child_conn, (self.data_ring.spec(), self.present_ring.spec(), self.bounds_ring.spec()),
+                  holistic_kwargs or {}, list(enabled_groups)),
+            name=f"holistic-{name}",
+            daemon=True
+        )
+        self.process_handle.start()
+        child_conn.close()
+
+    def _send(self, message):
+        # El pipe se comparte entre el hilo de inferencia y los handlers de Socket.IO
+        with self._send_lock:
+            self.conn.send(message)
+
+    def _frame_slot(self, image: np.ndarray) -> int:
+        # El anillo se dimensiona con el primer frame y solo se recrea si llega uno más grande
+        ring = self.frame_ring
+        if (ring is None or ring.dtype != image.dtype or ring.shape[2:] != image.shape[2:]
+                or ring.shape[0] < image.shape[0] or ring.shape[1] < image.shape[1]):
+            if self.frame_ring is not None:
+                self.frame_ring.close(unlink=True)
+            self.frame_ring = SharedRing(self.slots, image.shape, image.dtype)
+            self._send(('frames', self.frame_ring.spec()))
+        slot = self.next_slot
+        self.next_slot = (slot + 1) % self.slots
+        return slot
+
+    def process(self, image: np.ndarray):
+        slot = self._frame_slot(image)
+        height, width = image.shape[:2]
+        np.copyto(self.frame_ring.array[slot, :height, :width], image)
+        self._send(('process', (slot, height, width)))
+
+        kind, payload = self.conn.recv()
+        if kind == 'error':
+            raise RuntimeError(payload)
+        if kind == 'empty':
+            return image, None
+        # Copia pequeña (~9 KB): la casilla se reutiliza en el siguiente frame
+        landmarks = LandmarkFrame(
+            data=self.data_ring.array[payload].copy(),
+            present=self.present_ring.array[payload].copy(),
+            bounds=self.bounds_ring.array[payload].copy()
+        )
+        return image, landmarks
+
+    def set_enabled_groups(self, groups):
+        self._send(('groups', list(groups)))
+
+    def reset(self):
+        """Reinicia el estado de seguimiento del modelo (el hijo lo vuelve a calentar)"""
+        self._send(('reset', None))
+
+    def close(self):
+        try:
+            self._send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process_handle.join(timeout=5.0)
+        if self.process_handle.is_alive():
+            self.process_handle.terminate()
+        self.conn.close()
+        if self.frame_ring is not None:
+            self.frame_ring.close(unlink=True)
+        self.data_ring.close(unlink=True)
+        self.present_ring.close(unlink=True)
+        self.bounds_ring.close(unlink=True)
+
+
+class SparseInference:
+    """Reduce el costo de inferencia por cámara recortando a la ROI e infiriendo uno de cada N frames.
+
+    Envuelve un ``process(image) -> (image, LandmarkFrame | None)`` (hilo o
+    ProcessInference). Con ``roi_padding`` el modelo recibe solo la caja de la
+    pose anterior ampliada en ese factor (nunca menor que ``min_roi`` de la
+    imagen) y los landmarks se devuelven a la escala de la imagen completa; si
+    en el recorte no aparece la pose, el siguiente frame se procesa completo.
+    Con ``every_n > 1`` los frames intermedios se extrapolan a velocidad
+    constante desde las dos últimas inferencias y se marcan ``predicted``; no
+    se extrapola más allá de ``max_prediction`` segundos.
+    """
+
+    def __init__(self, process, every_n: int = 1, roi_padding: Optional[float] = None,
+                 min_roi: float = 0.35, max_prediction: float = 0.25):
+        self.process_full = process
+        self.every_n = max(1, every_n)
+        self.roi_padding = roi_padding
+        self.min_roi = min_roi
+        self.max_prediction = max_prediction
+        self.roi: Optional[Tuple[int, int, int, int]] = None
+        self._roi_shape: Optional[Tuple[int, int]] = None
+        self.frames = 0
+        self.inferred = 0
+        self.extrapolated = 0
+        self.roi_inferred = 0
+        self.roi_misses = 0  # recortes en los que no apareció la pose
+        self._last: Optional[Tuple[float, LandmarkFrame]] = None
+        self._velocity: Optional[np.ndarray] = None
+
+    def process(self, image: np.ndarray):
+        now = monotonic()
+        self.frames += 1
+        if self.every_n > 1 and (self.frames - 1) % self.every_n:
+            predicted = self._extrapolate(now)
+            if predicted is not None:
+                self.extrapolated += 1
+                return image, predicted
+
+        landmarks = self._infer(image)
+        self.inferred += 1
+        self._observe(now, landmarks)
+        return image, landmarks
+
+    def _infer(self, image: np.ndarray) -> Optional[LandmarkFrame]:
+        height, width = image.shape[:2]
+        if self.roi is None or self._roi_shape != (height, width):
+            # Sin pose previa o cambió la resolución de captura: imagen completa
+            _, landmarks = self.process_full(image)
+        else:
+            x0, y0, x1, y1 = self.roi
+            _, landmarks = self.process_full(image[y0:y1, x0:x1])
+            self.roi_inferred += 1
+            if landmarks is not None:
+                self._from_crop(landmarks, x0, y0, x1 - x0, y1 - y0, width, height)
+            else:
+                self.roi_misses += 1
+        self.roi = self._next_roi(landmarks, width, height)
+        self._roi_shape = (height, width)
+        return landmarks
+
+    @staticmethod
+    def _from_crop(landmarks: LandmarkFrame, x0: int, y0: int, crop_width: int, crop_height: int,
+                   width: int, height: int):
+        """Pasa un resultado del recorte a la escala de la imagen completa (en su lugar)"""
+        # Las coordenadas ya están centradas en la pose, así que solo cambia la escala;
+        # MediaPipe expresa z en la misma escala que x
+        scale_x = crop_width / width
+        scale_y = crop_height / height
+        landmarks.data[:, [0, 2]] *= scale_x
+        landmarks.data[:, 1] *= scale_y
+        if landmarks.bounds is not None:
+            landmarks.bounds[[0, 2]] = (landmarks.bounds[[0, 2]] * crop_width + x0) / width
+            landmarks.bounds[[1, 3]] = (landmarks.bounds[[1, 3]] * crop_height + y0) / height
+
+    def _next_roi(self, landmarks: Optional[LandmarkFrame], width: int, height: int):
+        if self.roi_padding is None or landmarks is None or landmarks.bounds is None:
+            return None
+        bx0, by0, bx1, by1 = np.clip(landmarks.bounds, 0.0, 1.0) * (width, height, width, height)
+        size = max(bx1 - bx0, by1 - by0) * (1.0 + 2.0 * self.roi_padding)
+        half_width = max(size, self.min_roi * width) / 2
+        half_height = max(size, self.min_roi * height) / 2
+        center_x, center_y = (bx0 + bx1) / 2, (by0 + by1) / 2
+        x0 = int(max(0, center_x - half_width))
+        y0 = int(max(0, center_y - half_height))
+        x1 = int(min(width, center_x + half_width))
+        y1 = int(min(height, center_y + half_height))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+
+    def _observe(self, now: float, landmarks: Optional[LandmarkFrame]):
+        if landmarks is None:
+            self._last = None
+            self._velocity = None
+            return
+        self._velocity = None
+        if self._last is not None:
+            last_time, last = self._last
+            both = landmarks.present & last.present
+            self._velocity = np.zeros((len(landmarks.present), 3), dtype=np.float32)
+            self._velocity[both] = (landmarks.data[both, :3] - last.data[both, :3]) / (now - last_time)
+        self._last = (now, landmarks)
+
+    def _extrapolate(self, now: float) -> Optional[LandmarkFrame]:
+        if self._last is None:
+            return None
+        last_time, last = self._last
+        elapsed = now - last_time
+        if elapsed > self.max_prediction:
+            return None
+        data = last.data.copy()
+        if self._velocity is not None:
+            data[:, :3] += self._velocity * elapsed
+        return LandmarkFrame(data=data, present=last.present.copy(), predicted=True, bounds=last.bounds)
+
+    def stats(self) -> dict:
+        """Frames inferidos (completos o en la ROI) y extrapolados, para comparar contra la inferencia completa"""
+        return {'frames': self.frames, 'inferred': self.inferred, 'extrapolated': self.extrapolated,
+                'roi_inferred': self.roi_inferred, 'roi_misses': self.roi_misses,
+                'every_n': self.every_n, 'roi_padding': self.roi_padding, 'roi': self.roi}
@@ -0,0 +1,117 @@
+#joint_history.py
+import os
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+from timebase import ring_nearest, ring_range
+
+
+class JointHistory:
+    """Historial columnar y acotado de la cinemática articular.
+
+    Cada columna es un arreglo float32 preasignado ``(capacity, n_joints, 3)``
+    (ángulos, velocidades y aceleraciones) más un anillo de tiempos y otro que
+    marca los frames calculados sobre landmarks extrapolados. La política
+    de retención decide qué pasa cuando se llena:
+
+    - ``ring``: sobrescribe los frames más antiguos.
+    - ``time``: como ``ring``, pero además descarta los frames con más de
+      ``max_age`` segundos.
+    - ``spill``: vuelca el bloque completo a ``spill_dir`` como ``.npz`` y empieza
+      de nuevo, de modo que la memoria queda acotada sin perder datos.
+    """
+
+    RETENTION_POLICIES = ('ring', 'time', 'spill')
+    COLUMNS = ('time', 'angles', 'velocities', 'accelerations', 'predicted')
+
+    def __init__(self, joint_names: List[str], capacity: int = 9000, retention: str = 'ring',
+                 max_age: Optional[float] = None, spill_dir: Optional[str] = None):
+        if retention not in self.RETENTION_POLICIES:
+            raise ValueError(f"Unknown retention policy '{retention}', expected one of {self.RETENTION_POLICIES}")
+        if retention == 'time' and max_age is None:
+            raise ValueError("Retention policy 'time' requires max_age")
+        if retention == 'spill' and spill_dir is None:
+            raise ValueError("Retention policy 'spill' requires spill_dir")
+
+        self.joint_names = list(joint_names)
+        self.joint_index = {name: i for i, name in enumerate(self.joint_names)}
+        self.capacity = capacity
+        self.retention = retention
+        self.max_age = max_age
+        self.spill_dir = spill_dir
+        self.spilled_chunks: List[str] = []
+
+        shape = (capacity, len(self.joint_names), 3)
+        self.time = np.zeros(capacity)
+        self.angles = np.zeros(shape, dtype=np.float32)
+        self.velocities = np.zeros(shape, dtype=np.float32)
+        self.accelerations = np.zeros(shape, dtype=np.float32)
+        self.predicted = np.zeros(capacity, dtype=bool)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, timestamp: float, angles: np.ndarray, velocities: np.ndarray, accelerations: np.ndarray,
+               predicted: bool = False):
+        """Agrega un frame ``(n_joints, 3)`` de cada columna"""
+        if self.retention == 'spill' and self.count == self.capacity:
+            self.spill()
+
+        self.time[self.head] = timestamp
+        self.angles[self.head] = angles
+        self.velocities[self.head] = velocities
+        self.accelerations[self.head] = accelerations
+        self.predicted[self.head] = predicted
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+        if self.retention == 'time':
+            oldest_allowed = timestamp - self.max_age
+            while self.count > 1 and self.time[(self.head - self.count) % self.capacity] < oldest_allowed:
+                self.count -= 1
+
+    def ordered_slots(self) -> np.ndarray:
+        return (self.head - self.count + np.arange(self.count)) % self.capacity
+
+    def latest_slot(self) -> Optional[int]:
+        return (self.head - 1) % self.capacity if self.count else None
+
+    def window(self, t0: float, t1: float) -> Dict[str, np.ndarray]:
+        """Columnas de los frames con tiempo en ``[t0, t1]``; los bordes se buscan por bisección"""
+        return self._columns(ring_range(self.time, self.head, self.count, t0, t1))
+
+    def nearest_slot(self, t: float) -> Optional[int]:
+        """Posición del frame más cercano a ``t`` (p. ej. para alinear una muestra de EMG)"""
+        return ring_nearest(self.time, self.head, self.count, t)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Copia cronológica de todas las columnas retenidas en memoria"""
+        return self._columns(self.ordered_slots())
+
+    def chunks(self) -> Iterator[Dict[str, np.ndarray]]:
+        """Todo el historial en orden cronológico: los bloques volcados a disco y después lo retenido"""
+        for path in self.spilled_chunks:
+            with np.load(path) as chunk:
+                yield {column: chunk[column] for column in self.COLUMNS}
+        yield self.columns()
+
+    def _columns(self, slots: np.ndarray) -> Dict[str, np.ndarray]:
+        return {
+            'time': self.time[slots],
+            'angles': self.angles[slots],
+            'velocities': self.velocities[slots],
+            'accelerations': self.accelerations[slots],
+            'predicted': self.predicted[slots],
+        }
+
+    def spill(self):
+        """Vuelca los frames retenidos a disco y libera el anillo"""
+        if not self.count:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"joint_history_{len(self.spilled_chunks):05d}.npz")
+        np.savez(path, joint_names=np.array(self.joint_names), **self.columns())
+        self.spilled_chunks.append(path)
+        self.head = 0
+        self.count = 0
@@ -53,6 +53,65 @@ const canvasElement = document.getElementsByClassName('output_canvas')[0];
 const controlsElement = document.getElementsByClassName('control-panel')[0];
 const canvasCtx = canvasElement.getContext('2d');
 
+// Envío de landmarks al servidor (landmark_ingest.py): MediaPipe corre aquí y el servidor solo
+// fusiona y analiza. Los frames se juntan en lotes de float32 y se manda uno por vez (ack) cada
+// INGEST_BATCH_MS como mínimo. Es opcional: ?ingest=1 lo activa y ?shared=1 alimenta el análisis común.
+const INGEST_GROUPS = [['pose', 'poseLandmarks', 33], ['left_hand', 'leftHandLandmarks', 21], ['right_hand', 'rightHandLandmarks', 21]];
+const INGEST_POINTS = INGEST_GROUPS.reduce((total, group) => total + group[2], 0);
+const INGEST_BATCH_MS = 100;
+const INGEST_MAX_FRAMES = 60;
+const ingestParams = new URLSearchParams(window.location.search);
+const ingestSocket = (window.io && ingestParams.get('ingest') === '1') ? window.io() : null;
+let ingestFrames = [], ingestTimes = [];
+let ingestInFlight = false, ingestLastSent = 0;
+
+function queueLandmarks(results) {
+    if (!ingestSocket || !results.poseLandmarks) return;
+    const frame = new Float32Array(INGEST_POINTS * 4).fill(NaN);
+    let offset = 0;
+    for (const [, field, size] of INGEST_GROUPS) {
+        const points = results[field];
+        if (points) {
+            points.forEach((p, i) => {
+                if (p) frame.set([p.x, p.y, p.z, p.visibility ?? 0], offset + i * 4);
+            });
+        }
+        offset += size * 4;
+    }
+    ingestFrames.push(frame);
+    ingestTimes.push(performance.now());
+    // Si el servidor se atrasa se descartan los frames más viejos en lugar de acumularlos
+    if (ingestFrames.length > INGEST_MAX_FRAMES) {
+        ingestFrames.shift();
+        ingestTimes.shift();
+    }
+    flushLandmarks();
+}
+
+function flushLandmarks() {
+    const now = performance.now();
+    if (ingestInFlight || !ingestFrames.length || now - ingestLastSent < INGEST_BATCH_MS) return;
+    const data = new Float32Array(ingestFrames.length * INGEST_POINTS * 4);
+    ingestFrames.forEach((frame, i) => data.set(frame, i * INGEST_POINTS * 4));
+    const batch = {
+        camera_id: 0,
+        groups: INGEST_GROUPS.map(group => group[0]),
+        times: ingestTimes,
+        data: data.buffer,
+        shared: ingestParams.get('shared') === '1'
+    };
+    ingestFrames = [];
+    ingestTimes = [];
+    ingestInFlight = true;
+    ingestLastSent = now;
+    ingestSocket.emit('ingest_landmarks', batch, (reply) => {
+        ingestInFlight = false;
+        if (reply && reply.error) {
+            console.error('Ingesta de landmarks:', reply.error);
+        }
+    });
+}
+
 const fpsControl = new controls.FPS();
 const spinner = document.querySelector('.loading');
 spinner.ontransitionend = () => {
@@ -111,6 +170,8 @@ function drawAngleTriangle(joint, segment1, segment2, angle, color) {
 
 function onResults(results) {
     document.body.classList.add('loaded');
+    // Antes de removeLandmarks, que borra puntos de la pose
+    queueLandmarks(results);
     removeLandmarks(results);
 
     fpsControl.tick();
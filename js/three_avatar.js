@@ -104,7 +104,7 @@ class AvatarViewer {
         this.scene.add(plane);
     }
 
-    updateSkeleton(landmarks) {
+    updateSkeleton(landmarks, connections = landmarks.connections) {
         while(this.skeletonGroup.children.length > 0) {
             const child = this.skeletonGroup.children[0];
             child.geometry.dispose();
@@ -134,9 +134,9 @@ class AvatarViewer {
             }
         });
 
-        // Crear las conexiones desde KTK
-        if (landmarks.connections) {
-            this.createConnectionsFromKTK(landmarks, landmarks.connections);
+        // Crear las conexiones desde KTK (la topología llega una sola vez por cliente)
+        if (connections) {
+            this.createConnectionsFromKTK(landmarks, connections);
         }
     }
 
@@ -269,4 +269,98 @@ class AvatarViewer {
             onUpdate: () => this.controls.update()
         });
     }
+}
+
+// Decodificador del formato binario de data_update_bin (ver wire_format.py)
+class BinaryFrameDecoder {
+    static FLAG_DELTA = 0x01;
+    static FLAG_INT8 = 0x02;
+    static FLAG_ANGLES = 0x04;
+    static FLAG_PREDICTED = 0x08;
+    static HEADER_BYTES = 16;
+
+    constructor(schema) {
+        this.schema = schema;
+        this.maskBytes = Math.ceil(schema.landmark_names.length / 8);
+        this.sequence = null;
+        this.quantized = null;
+    }
+
+    static pad4(n) {
+        return (n + 3) & ~3;
+    }
+
+    // Devuelve {landmarks, angles, predicted} con la misma forma que data_update, o null si
+    // llega un delta sin su frame base (se espera al siguiente frame completo)
+    decode(packet) {
+        const buffer = packet instanceof ArrayBuffer
+            ? packet
+            : packet.buffer.slice(packet.byteOffset, packet.byteOffset + packet.byteLength);
+        const view = new DataView(buffer);
+        const flags = view.getUint8(1);
+        const nPoints = view.getUint16(2, true);
+        const nJoints = view.getUint16(4, true);
+        const sequence = view.getUint32(6, true);
+        const scale = view.getFloat32(10, true);
+
+        let offset = BinaryFrameDecoder.HEADER_BYTES;
+        const mask = new Uint8Array(buffer, offset, this.maskBytes);
+        offset += BinaryFrameDecoder.pad4(this.maskBytes);
+
+        const isInt8 = flags & BinaryFrameDecoder.FLAG_INT8;
+        const coords = isInt8
+            ? new Int8Array(buffer, offset, nPoints * 3)
+            : new Int16Array(buffer, offset, nPoints * 3);
+        offset += BinaryFrameDecoder.pad4(coords.byteLength);
+
+        let quantized;
+        if (flags & BinaryFrameDecoder.FLAG_DELTA) {
+            if (this.quantized === null || this.sequence === null
+                    || sequence !== ((this.sequence + 1) >>> 0)
+                    || this.quantized.length !== coords.length) {
+                this.sequence = null;
+                return null;
+            }
+            quantized = new Int32Array(coords.length);
+            for (let i = 0; i < coords.length; i++) {
+                quantized[i] = this.quantized[i] + coords[i];
+            }
+        } else {
+            quantized = Int32Array.from(coords);
+        }
+        this.quantized = quantized;
+        this.sequence = sequence;
+
+        const landmarks = {};
+        const names = this.schema.landmark_names;
+        let point = 0;
+        for (let idx = 0; idx < names.length; idx++) {
+            if (mask[idx >> 3] & (1 << (idx & 7))) {
+                landmarks[names[idx]] = {
+                    x: quantized[point * 3] * scale,
+                    y: quantized[point * 3 + 1] * scale,
+                    z: quantized[point * 3 + 2] * scale
+                };
+                point++;
+            }
+        }
+
+        const angles = {};
+        if (flags & BinaryFrameDecoder.FLAG_ANGLES) {
+            const values = new Float32Array(buffer, offset, 3 * nJoints * 3);
+            const kinds = ['angles', 'velocities', 'accelerations'];
+            this.schema.joint_names.forEach((joint, j) => {
+                angles[joint] = {};
+                kinds.forEach((kind, k) => {
+                    angles[joint][kind] = {};
+                    this.schema.angle_names[j].forEach((angleName, a) => {
+                        angles[joint][kind][angleName] = values[(k * nJoints + j) * 3 + a];
+                    });
+                });
+            });
+        }
+
+        const predicted = Boolean(flags & BinaryFrameDecoder.FLAG_PREDICTED);
+        return { landmarks, angles, predicted };
+    }
 }
\ No newline at end of file
@@ -0,0 +1,104 @@
+#landmark_ingest.py
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from landmarks import LANDMARK_GROUPS, LandmarkFrame
+from mech_analysis import BiomechanicalAnalysis
+from skeleton import LandmarkNormalizer
+from timebase import CLOCK, RemoteClock
+
+MAX_BATCH_FRAMES = 60  # con cara, 60 frames ya son ~0.5 MB (Socket.IO acepta hasta 1 MB)
+INGEST_GROUPS = ('pose', 'left_hand', 'right_hand', 'face')
+
+
+def decode_batch(batch: dict) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Convierte un lote del navegador en ``(tiempos, {grupo: (n_frames, puntos, 4)})``.
+
+    El lote trae ``groups`` (orden de los grupos en cada frame), ``times`` (un
+    tiempo por frame, en ms del reloj del cliente) y ``data``: float32 con los
+    landmarks normalizados de MediaPipe (x, y, z, visibilidad) de cada grupo,
+    frame tras frame. Un grupo no detectado en un frame viaja como NaN.
+    """
+    groups = list(batch.get('groups') or ())
+    unknown = [group for group in groups if group not in INGEST_GROUPS]
+    if not groups or unknown or 'pose' not in groups:
+        raise ValueError(f"groups must include 'pose' and only {INGEST_GROUPS}")
+    times = np.asarray(batch.get('times') or (), dtype=np.float64)
+    if not 0 < len(times) <= MAX_BATCH_FRAMES:
+        raise ValueError(f"A batch must carry between 1 and {MAX_BATCH_FRAMES} frames")
+    data = batch.get('data')
+    if not isinstance(data, (bytes, bytearray)):
+        raise ValueError("data must be a binary Float32Array buffer")
+
+    points = sum(LANDMARK_GROUPS[group] for group in groups)
+    if len(data) != len(times) * points * 4 * 4:
+        raise ValueError(f"Expected {len(times)} frames of {points} landmarks, got {len(data)} bytes")
+    values = np.frombuffer(data, dtype='<f4').reshape(len(times), points, 4)
+
+    arrays = {}
+    start = 0
+    for group in groups:
+        arrays[group] = values[:, start:start + LANDMARK_GROUPS[group]]
+        start += LANDMARK_GROUPS[group]
+    return times, arrays
+
+
+class IngestSession:
+    """Análisis de un cliente que corre MediaPipe en el navegador.
+
+    Guarda el último frame de cada cámara del cliente para fusionarlas, su
+    propio BiomechanicalAnalysis (con un historial corto, para que muchos
+    clientes quepan en memoria) y el RemoteClock que pasa sus tiempos al
+    reloj común. ``normalizer`` arma y fusiona los frames sin cargar MediaPipe.
+    """
+
+    def __init__(self, normalizer: LandmarkNormalizer, history_size: int = 600):
+        self.normalizer = normalizer
+        self.analysis = BiomechanicalAnalysis(history_size=history_size)
+        self.clock = RemoteClock()
+        self.cameras: Dict[str, LandmarkFrame] = {}
+        self.frames = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def frames_from_batch(self, batch: dict) -> List[LandmarkFrame]:
+        """Decodifica un lote y devuelve sus frames con pose, sellados en el reloj común"""
+        received_at = CLOCK.now()
+        times, arrays = decode_batch(batch)
+        self.clock.observe(times[-1], received_at)
+        stamps = self.clock.to_local(times)
+
+        frames = []
+        for i, stamp in enumerate(stamps):
+            frame = self.normalizer.landmarks_from_arrays(arrays['pose'][i], {
+                group: points[i] for group, points in arrays.items() if group != 'pose'
+            })
+            if frame is None:
+                self.skipped += 1
+                continue
+            frame.timestamp = float(stamp)
+            frames.append(frame)
+        return frames
+
+    def ingest(self, camera_id: str, frames: List[LandmarkFrame]) -> Optional[dict]:
+        """Fusiona y analiza los frames en orden; devuelve los ángulos del último"""
+        angles = None
+        with self.lock:
+            for frame in frames:
+                self.cameras[camera_id] = frame
+                if len(self.cameras) > 1:
+                    merged = self.normalizer.merge_landmarks(self.cameras)
+                    merged.timestamp = frame.timestamp
+                else:
+                    merged = frame
+                angles = self.analysis.update_points_from_avatar(merged)
+                self.frames += 1
+        return angles
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'cameras': sorted(self.cameras),
+            'clock_offset': self.clock.offset,
+        }
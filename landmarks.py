@@ -0,0 +1,130 @@
+#landmarks.py
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+# Grupos de landmarks de MediaPipe Holistic en el orden del arreglo canónico
+LANDMARK_GROUPS = {
+    "pose": 33,
+    "left_hand": 21,
+    "right_hand": 21,
+    "face": 468
+}
+
+LANDMARK_NAMES = [
+    f"{group}_{i}"
+    for group, size in LANDMARK_GROUPS.items()
+    for i in range(size)
+]
+LANDMARK_INDEX = {name: i for i, name in enumerate(LANDMARK_NAMES)}
+N_LANDMARKS = len(LANDMARK_NAMES)
+
+
+def _group_slices() -> Dict[str, slice]:
+    slices = {}
+    start = 0
+    for group, size in LANDMARK_GROUPS.items():
+        slices[group] = slice(start, start + size)
+        start += size
+    return slices
+
+
+GROUP_SLICES = _group_slices()
+
+
+def landmark_group(name: str) -> str:
+    """Grupo al que pertenece un landmark (``'left_hand_9'`` -> ``'left_hand'``)"""
+    return name.rsplit('_', 1)[0]
+
+
+def group_landmark_names(groups: Iterable[str]) -> list:
+    """Nombres de los landmarks de los grupos dados, en el orden canónico"""
+    groups = set(groups)
+    return [name for name in LANDMARK_NAMES if landmark_group(name) in groups]
+
+
+class LandmarkSubscriptions:
+    """Registro de los grupos de landmarks que necesita cada consumidor.
+
+    Cada suscriptor (el análisis, un cliente Socket.IO, ...) declara sus grupos y
+    el pipeline solo calcula y envía la unión de todos ellos.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, frozenset] = {}
+
+    def subscribe(self, subscriber: str, groups: Iterable[str]) -> bool:
+        """Registra los grupos de un suscriptor; devuelve True si la unión cambió"""
+        groups = frozenset(groups)
+        unknown = groups - LANDMARK_GROUPS.keys()
+        if unknown:
+            raise ValueError(f"Unknown landmark groups: {sorted(unknown)}")
+        before = self.groups()
+        self._subscribers[subscriber] = groups
+        return self.groups() != before
+
+    def unsubscribe(self, subscriber: str) -> bool:
+        before = self.groups()
+        self._subscribers.pop(subscriber, None)
+        return self.groups() != before
+
+    def groups(self) -> frozenset:
+        return frozenset().union(*self._subscribers.values())
+
+
+@dataclass
+class LandmarkFrame:
+    """Frame de landmarks con índice fijo: ``(543, 4)`` float32 más máscara de presencia.
+
+    Las columnas de ``data`` son x, y, z y visibilidad; ``present`` indica qué filas
+    contienen un punto válido en este frame. ``predicted`` marca los frames
+    extrapolados en lugar de inferidos y ``bounds`` guarda la caja
+    ``(x0, y0, x1, y1)`` de la pose en coordenadas normalizadas de la imagen.
+    ``timestamp`` es el instante de captura en el reloj común (timebase.CLOCK).
+    """
+    data: np.ndarray
+    present: np.ndarray
+    predicted: bool = False
+    bounds: Optional[np.ndarray] = None
+    timestamp: Optional[float] = None
+
+    @classmethod
+    def empty(cls) -> 'LandmarkFrame':
+        return cls(
+            data=np.zeros((N_LANDMARKS, 4), dtype=np.float32),
+            present=np.zeros(N_LANDMARKS, dtype=bool)
+        )
+
+    @classmethod
+    def from_dict(cls, landmarks_3d: dict) -> 'LandmarkFrame':
+        """Construye un frame desde la forma JSON ``{'pose_12': {'x', 'y', 'z'}, ...}``"""
+        frame = cls.empty()
+        for key, value in landmarks_3d.items():
+            idx = LANDMARK_INDEX.get(key)
+            if idx is not None and isinstance(value, dict) and all(k in value for k in ['x', 'y', 'z']):
+                frame.data[idx, :3] = (value['x'], value['y'], value['z'])
+                frame.data[idx, 3] = value.get('visibility', 1.0)
+                frame.present[idx] = True
+        return frame
+
+    def to_dict(self, groups: Optional[Iterable[str]] = None) -> dict:
+        """Convierte el frame a la forma JSON que usa el cliente (solo en el borde de Socket.IO)"""
+        present = self.present
+        if groups is not None:
+            present = np.zeros_like(self.present)
+            for group in groups:
+                present[GROUP_SLICES[group]] = self.present[GROUP_SLICES[group]]
+        indices = np.flatnonzero(present)
+        coords = self.data[indices, :3].tolist()
+        return {
+            LANDMARK_NAMES[idx]: {'x': x, 'y': y, 'z': z}
+            for idx, (x, y, z) in zip(indices.tolist(), coords)
+        }
+
+    def point(self, name: str) -> Optional[np.ndarray]:
+        """Coordenadas xyz de un landmark, o None si no está presente"""
+        idx = LANDMARK_INDEX[name]
+        return self.data[idx, :3] if self.present[idx] else None
+
+    def group_present(self, group: str) -> bool:
+        return bool(self.present[GROUP_SLICES[group]].any())
@@ -1,10 +1,30 @@
-from flask import Flask, render_template, Response, redirect, url_for, flash, request
-from flask_socketio import SocketIO, emit
+from time import sleep, monotonic, perf_counter, strftime
+BOOT_STARTED = perf_counter()
+
+from flask import Flask, render_template, Response, redirect, url_for, flash, request, jsonify
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-import cv2
 import os
-from multicamera_holistic import MultiCameraHolisticBiomechanics
+import atexit
+import threading
+import multiprocessing
 from mech_analysis import BiomechanicalAnalysis
+from landmarks import LandmarkSubscriptions, LANDMARK_NAMES, LANDMARK_GROUPS
+from wire_format import FrameEncoder, DataUpdate, WIRE_FORMAT_VERSION, KEYFRAME_INTERVAL
+from emit_scheduler import EmitScheduler
+from camera_pipeline import CameraPipeline
+from inference_workers import ProcessInference, SparseInference
+from video_broadcast import VideoHub, StreamSettings, AdaptiveStream
+from camera_tuning import TargetFpsController, default_profiles, START_PROFILE
+from holistic_pool import HolisticPool
+from emg_acquisition import EmgAcquisition, open_source
+from timebase import CLOCK
+from landmark_ingest import IngestSession
+from skeleton import TOPOLOGY_VERSION, LandmarkNormalizer, get_topology
+from config import Config
+
+# Segundos por etapa del arranque; MediaPipe y los modelos se cargan recién con la primera cámara
+STARTUP_TIMES = {'imports': perf_counter() - BOOT_STARTED}
 
 # Create Flask application
 app = Flask(__name__,
@@ -20,6 +40,17 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+# 'process': un proceso de inferencia por cámara; 'thread': el modelo corre en este proceso
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'process')
+HOLISTIC_OPTIONS = dict(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+# Inferir uno de cada N frames (el resto se extrapola) y recortar a la ROI de la pose anterior
+INFERENCE_EVERY_N = int(os.environ.get('INFERENCE_EVERY_N', '1'))
+INFERENCE_ROI_PADDING = float(os.environ['INFERENCE_ROI_PADDING']) if os.environ.get('INFERENCE_ROI_PADDING') else None
+# Workers que van a inferir pueden cargar MediaPipe y calentar modelos al arrancar
+PRELOAD_INFERENCE = os.environ.get('PRELOAD_INFERENCE', '0') == '1'
+# Puerto serie del Arduino de EMG, un pty, o 'file:grabacion.csv' para reproducir una grabación
+EMG_SOURCE = os.environ.get('EMG_SOURCE', Config.EMG_PORT)
+
 
 class User(UserMixin):
     def __init__(self, id):
@@ -40,30 +71,120 @@ class CameraManager:
     def __init__(self):
         self.cameras = {}
         self.active_cameras = set()
-        self.biomech = MultiCameraHolisticBiomechanics()
         self.biomech_analysis = BiomechanicalAnalysis()
         self.all_landmarks = {}
-
-    def add_camera(self, camera_id):
+        # Cada cámara infiere en su propio hilo; la fusión y el análisis son compartidos
+        self.analysis_lock = threading.Lock()
+
+        # Solo se extraen, fusionan y envían los grupos que alguien declaró necesitar
+        self.subscriptions = LandmarkSubscriptions()
+        self.subscriptions.subscribe('analysis', self.biomech_analysis.required_groups)
+        # Fusión y lotes del navegador no necesitan MediaPipe: el normalizador no lo carga
+        self.normalizer = LandmarkNormalizer()
+        self.normalizer.set_enabled_groups(self.subscriptions.groups())
+
+        # MediaPipe y el pool de modelos se crean en load(), con la primera cámara,
+        # no al importar el módulo; la topología sale de skeleton.py sin cargarlos
+        self._biomech = None
+        self._holistic_pool = None
+        self._load_lock = threading.Lock()
+
+        # Los clientes se suscriben a salas por cámara y tipo de dato; cada sala
+        # serializa un frame una vez por codificación y cada cliente recibe solo
+        # el más reciente a su propia tasa
+        self.scheduler = EmitScheduler(socketio)
+        self.client_encodings = {}
+        self.binary_encoders = {}
+
+        # Clientes que corren MediaPipe en el navegador y envían sus landmarks por lotes
+        self.ingest_sessions = {}
+
+    def load(self):
+        """Importa MediaPipe y crea el extractor y el pool de modelos (una sola vez)"""
+        if self._biomech is not None:
+            return
+        with self._load_lock:
+            if self._biomech is not None:
+                return
+            started = perf_counter()
+            from multicamera_holistic import MultiCameraHolisticBiomechanics
+            STARTUP_TIMES['import_mediapipe'] = perf_counter() - started
+
+            started = perf_counter()
+            biomech = MultiCameraHolisticBiomechanics()
+            biomech.set_enabled_groups(self.subscriptions.groups())
+            # Modelos precargados y calientes por configuración: iniciar una cámara no paga la carga
+            if INFERENCE_BACKEND == 'process':
+                self._holistic_pool = HolisticPool(
+                    lambda options: ProcessInference('pool', LANDMARK_GROUPS, options), warm=None
+                )
+            else:
+                self._holistic_pool = HolisticPool(lambda options: biomech.mp_holistic.Holistic(**options))
+            self._biomech = biomech
+            STARTUP_TIMES['camera_subsystems'] = perf_counter() - started
+            print(f"Camera subsystems loaded in {STARTUP_TIMES['import_mediapipe'] + STARTUP_TIMES['camera_subsystems']:.2f}s")
+
+    @property
+    def loaded(self):
+        return self._biomech is not None
+
+    @property
+    def biomech(self):
+        self.load()
+        return self._biomech
+
+    @property
+    def holistic_pool(self):
+        self.load()
+        return self._holistic_pool
+
+    def add_camera(self, camera_id, owner=None):
+        """Inicia una cámara; ``owner`` es el sid del cliente que la pidió y que la libera al desconectarse"""
         if camera_id not in self.cameras:
             try:
+                import cv2
+
                 # Use the same configuration that works for 2D
                 cap = cv2.VideoCapture(0)
 
                 if cap.isOpened():
-                    # Use exact same camera settings as 2D
-                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-
-                    # Store with same configuration as 2D
-                    self.cameras[camera_id] = {
-                        'capture': cap,
-                        'holistic': self.biomech.mp_holistic.Holistic(
-                            min_detection_confidence=0.5,
-                            min_tracking_confidence=0.5
+                    # El controlador elige resolución, modelo y grupos para sostener el FPS objetivo
+                    tuner = TargetFpsController(
+                        default_profiles(Config.CAMERA_WIDTH, Config.CAMERA_HEIGHT),
+                        target_fps=Config.TARGET_FPS,
+                        latency_budget=Config.LATENCY_BUDGET
+                    )
+                    profile = tuner.profile
+                    cap.set(cv2.CAP_PROP_FRAME_WIDTH, profile.width)
+                    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, profile.height)
+                    # Solo el frame más reciente: el driver no acumula frames viejos
+                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+                    camera = {'capture': cap, 'tuner': tuner, 'profile': profile, 'owner': owner}
+                    camera['holistic'] = self.acquire_holistic(profile)
+                    if INFERENCE_BACKEND == 'process':
+                        process = lambda image: camera['holistic'].process(image)
+                    else:
+                        process = lambda image: self.biomech.process_frame(
+                            image, camera['holistic'], camera['profile'].groups
                         )
-                    }
+                    camera['sparse'] = SparseInference(
+                        process,
+                        every_n=max(INFERENCE_EVERY_N, profile.every_n),
+                        roi_padding=INFERENCE_ROI_PADDING
+                    )
+                    camera['pipeline'] = CameraPipeline(
+                        camera_id,
+                        cap,
+                        process=camera['sparse'].process,
+                        on_landmarks=self.process_landmarks,
+                        on_processed=self.tune_camera if Config.AUTO_TUNE else None
+                    )
+                    camera['hub'] = VideoHub(camera_id, camera['pipeline'].results)
+
+                    self.cameras[camera_id] = camera
                     self.active_cameras.add(camera_id)
+                    camera['pipeline'].start()
                     print(f"Successfully initialized camera {camera_id}")
                     return True
                 else:
@@ -72,54 +193,382 @@ class CameraManager:
                 print(f"Error initializing camera {camera_id}: {e}")
         return False
 
-    def get_frame(self, camera_id):
-        if camera_id in self.cameras:
+    @staticmethod
+    def holistic_options(profile):
+        return dict(HOLISTIC_OPTIONS, **profile.holistic_options())
+
+    def acquire_holistic(self, profile):
+        """Toma del pool un modelo caliente con las opciones del perfil"""
+        holistic = self.holistic_pool.acquire(self.holistic_options(profile))
+        if isinstance(holistic, ProcessInference):
+            holistic.set_enabled_groups(self.camera_groups(profile))
+        return holistic
+
+    def preload(self):
+        """Hook para workers que van a inferir: carga MediaPipe ya y precalienta los modelos de la escalera de perfiles"""
+        self.load()
+        profiles = default_profiles(Config.CAMERA_WIDTH, Config.CAMERA_HEIGHT)
+        # El del perfil inicial primero: es el que toma la primera cámara
+        profiles.sort(key=lambda profile: profile.name != START_PROFILE)
+        options_list = []
+        for profile in profiles:
+            options = self.holistic_options(profile)
+            if options not in options_list:
+                options_list.append(options)
+        return self.holistic_pool.prewarm_async(options_list, Config.HOLISTIC_POOL_SIZE)
+
+    def shutdown(self):
+        """Detiene las cámaras y cierra los modelos del pool (al salir del proceso)"""
+        for camera_id in list(self.cameras):
+            self.release_camera(camera_id)
+        if self._holistic_pool is not None:
+            self._holistic_pool.close()
+
+    def camera_groups(self, profile):
+        """Grupos que extrae una cámara: los suscritos, limitados por su perfil"""
+        enabled = self.subscriptions.groups() | {'pose'}
+        if profile.groups is None:
+            return enabled
+        return enabled & (profile.groups | {'pose'})
+
+    def tune_camera(self, camera_id, processed):
+        """Alimenta el controlador de la cámara; se llama desde su hilo de inferencia"""
+        camera = self.cameras.get(camera_id)
+        if camera is None:
+            return
+        profile = camera['tuner'].record(processed.latency, processed.inference_time)
+        if profile is not None and self.apply_profile(camera_id, profile):
+            socketio.emit('camera_profile', self.camera_status(camera_id))
+
+    def apply_profile(self, camera_id, profile):
+        """Aplica un perfil: modelo, resolución (en el hilo de captura), frames inferidos y grupos.
+
+        Si el modelo del perfil no se puede crear, la cámara sigue con el perfil
+        anterior y devuelve False.
+        """
+        camera = self.cameras[camera_id]
+        previous = camera['profile']
+        holistic = camera['holistic']
+        if profile.holistic_options() != previous.holistic_options():
+            # Se llama entre frames desde el hilo de inferencia: nadie está usando el modelo viejo
             try:
-                success, frame = self.cameras[camera_id]['capture'].read()
-                if success:
-                    frame = cv2.flip(frame, 1)
-                    processed_frame, landmarks = self.biomech.process_frame(
-                        frame,
-                        self.cameras[camera_id]['holistic']
-                    )
-
-                    if landmarks:
-                        self.all_landmarks[camera_id] = landmarks
-
-                        if len(self.active_cameras) > 1:
-                            merged_landmarks = self.biomech.merge_landmarks(self.all_landmarks)
-                            if merged_landmarks:
-                                current_angles = self.biomech_analysis.update_points_from_avatar(merged_landmarks)
-                                socketio.emit('data_update', {
-                                    'landmarks': merged_landmarks,
-                                    'angles': current_angles
-                                })
-                        else:
-                            current_angles = self.biomech_analysis.update_points_from_avatar(landmarks)
-                            socketio.emit('data_update', {
-                                'landmarks': landmarks,
-                                'angles': current_angles
-                            })
-
-                    return processed_frame
+                camera['holistic'] = self.acquire_holistic(profile)
             except Exception as e:
-                print(f"Error processing frame: {e}")
-        return None
+                print(f"Camera {camera_id}: could not load the model for profile {profile.name}: {e}")
+                camera['tuner'].undo()
+                return False
+            self.holistic_pool.release(holistic, self.holistic_options(previous))
+        elif isinstance(holistic, ProcessInference) and profile.groups != previous.groups:
+            holistic.set_enabled_groups(self.camera_groups(profile))
+
+        camera['profile'] = profile
+        print(f"Camera {camera_id}: profile {previous.name} -> {profile.name}")
+        if (profile.width, profile.height) != (previous.width, previous.height):
+            camera['pipeline'].request_capture_size(profile.width, profile.height)
+        camera['sparse'].every_n = max(INFERENCE_EVERY_N, profile.every_n)
+        return True
+
+    def camera_status(self, camera_id):
+        camera = self.cameras[camera_id]
+        status = camera['tuner'].status()
+        status['camera_id'] = camera_id
+        # Inferencia dispersa (INFERENCE_EVERY_N / INFERENCE_ROI_PADDING) frente a la completa
+        status['sparse'] = camera['sparse'].stats()
+        return status
+
+    def process_landmarks(self, camera_id, landmarks):
+        """Fusiona, analiza y emite los landmarks de una cámara (se llama desde su hilo de inferencia)"""
+        self.emit_raw_landmarks(camera_id, landmarks)
+        self.analyze_landmarks(camera_id, landmarks)
+
+    def analyze_landmarks(self, source_id, landmarks):
+        """Fusiona el frame con el último de las demás fuentes (cámaras o clientes), lo analiza y lo emite"""
+        with self.analysis_lock:
+            self.all_landmarks[source_id] = landmarks
+
+            if len(self.all_landmarks) > 1:
+                merged_landmarks = self.normalizer.merge_landmarks(self.all_landmarks)
+                if merged_landmarks is None:
+                    return
+                merged_landmarks.predicted = landmarks.predicted
+                # El frame fusionado corresponde a la captura más reciente que lo cambió
+                merged_landmarks.timestamp = landmarks.timestamp
+            else:
+                merged_landmarks = landmarks
+            current_angles = self.biomech_analysis.update_points_from_avatar(merged_landmarks)
+            self.emit_data_update(merged_landmarks, current_angles)
+
+    def video_hub(self, camera_id):
+        """Hub MJPEG de la cámara, o None si no está iniciada"""
+        camera = self.cameras.get(camera_id)
+        return camera['hub'] if camera is not None else None
+
+    def get_frame(self, camera_id):
+        """Último frame procesado de la cámara (no bloquea)"""
+        camera = self.cameras.get(camera_id)
+        if camera is None:
+            return None
+        _, processed = camera['pipeline'].results.latest()
+        return processed.image if processed is not None else None
+
+    def emit_data_update(self, landmarks, angles):
+        """Entrega el frame fusionado y los ángulos a sus salas; se codifican al enviarlos.
+
+        Las conexiones no viajan en cada frame: el cliente recibe la topología al conectarse.
+        """
+        kinematics = None
+        if self.scheduler.has_members('merged') or self.scheduler.has_members('angles'):
+            kinematics = self.biomech_analysis.get_current_kinematics()
+        if self.scheduler.has_members('merged'):
+            self.scheduler.offer('merged', DataUpdate(
+                landmarks, angles, kinematics, TOPOLOGY_VERSION
+            ))
+        if self.scheduler.has_members('angles'):
+            self.scheduler.offer('angles', DataUpdate(
+                None, angles, kinematics, TOPOLOGY_VERSION,
+                predicted=landmarks.predicted, stream='angles', time=landmarks.timestamp
+            ))
+
+    def emit_raw_landmarks(self, camera_id, landmarks):
+        room = self.stream_room('raw', camera_id)
+        if self.scheduler.has_members(room):
+            self.scheduler.offer(room, DataUpdate(
+                landmarks, None, None, TOPOLOGY_VERSION, stream=room, camera_id=camera_id
+            ))
+
+    @staticmethod
+    def stream_room(stream, camera_id=None):
+        """Sala de un tipo de dato: 'merged', 'angles' o 'camera_<id>' para landmarks crudos"""
+        if stream in ('merged', 'angles'):
+            return stream
+        if stream == 'raw':
+            if camera_id is None:
+                raise ValueError("Raw landmark streams require a camera_id")
+            return f"camera_{int(camera_id)}"
+        raise ValueError(f"Unknown stream '{stream}'")
+
+    def _client_encoder(self, encoding, room):
+        """Función que convierte un DataUpdate en ``(event, *args)`` para un cliente en una sala.
+
+        La sala 'merged' conserva los eventos data_update / data_update_bin; el resto
+        usa stream_update / stream_update_bin con el nombre de la sala como primer argumento.
+        """
+        if encoding not in ('json', 'binary', 'binary_delta'):
+            raise ValueError(f"Unknown encoding '{encoding}'")
+        merged = room == 'merged'
+        if encoding == 'json':
+            event = 'data_update' if merged else 'stream_update'
+            return lambda update: (event, update.json())
+
+        event = 'data_update_bin' if merged else 'stream_update_bin'
+        if encoding == 'binary':
+            encoder = self.binary_encoders.setdefault(room, FrameEncoder())
+        else:
+            # Los deltas son por cliente: se calculan respecto al último frame que ese cliente recibió
+            encoder = FrameEncoder(delta=True)
+        if merged:
+            return lambda update: (event, update.binary(encoder))
+        return lambda update: (event, room, update.binary(encoder))
+
+    def add_client(self, sid):
+        self.client_encodings[sid] = 'json'
+
+    def subscribe_stream(self, sid, stream, camera_id=None, max_rate=30.0):
+        if max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        room = self.stream_room(stream, camera_id)
+        self.scheduler.join(sid, room, self._client_encoder(self.client_encodings.get(sid, 'json'), room), max_rate)
+        return room
+
+    def unsubscribe_stream(self, sid, stream, camera_id=None):
+        room = self.stream_room(stream, camera_id)
+        self.scheduler.leave(sid, room)
+        return room
+
+    def set_client_encoding(self, sid, encoding):
+        for room in self.scheduler.client_rooms(sid):
+            self.scheduler.configure(sid, room, encode=self._client_encoder(encoding, room))
+        self.client_encodings[sid] = encoding
+
+    def set_client_rate(self, sid, max_rate, stream=None, camera_id=None):
+        if max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        rooms = self.scheduler.client_rooms(sid) if stream is None else [self.stream_room(stream, camera_id)]
+        for room in rooms:
+            self.scheduler.configure(sid, room, max_rate=max_rate)
+
+    def remove_client(self, sid):
+        self.client_encodings.pop(sid, None)
+        self.scheduler.remove_client(sid)
+        self.unsubscribe_landmarks(sid)
+        self.ingest_sessions.pop(sid, None)
+        with self.analysis_lock:
+            # Las fuentes remotas se identifican como ('remote', sid, camera_id)
+            self._drop_sources([key for key in self.all_landmarks if isinstance(key, tuple) and key[1] == sid])
+
+    def ingest_landmarks(self, sid, batch, shared=False):
+        """Analiza un lote de landmarks calculados en el navegador.
+
+        Por defecto cada cliente tiene su propio análisis y la respuesta (ack)
+        trae los ángulos del último frame. Con ``shared`` los frames entran a
+        la fusión y al análisis comunes junto con las cámaras del servidor, como
+        una fuente más, y salen por las salas de siempre.
+        """
+        session = self.ingest_sessions.get(sid)
+        if session is None:
+            session = IngestSession(self.normalizer, Config.INGEST_HISTORY_SIZE)
+            self.ingest_sessions[sid] = session
+        camera_id = str(batch.get('camera_id', 0))
+        frames = session.frames_from_batch(batch)
+        reply = {'frames': len(frames), 'time': frames[-1].timestamp if frames else None}
+        if shared:
+            for frame in frames:
+                self.analyze_landmarks(('remote', sid, camera_id), frame)
+        else:
+            reply['angles'] = session.ingest(camera_id, frames)
+        return reply
+
+    def get_binary_schema(self):
+        """Orden fijo de landmarks y articulaciones para decodificar data_update_bin"""
+        return {
+            'version': WIRE_FORMAT_VERSION,
+            'landmark_names': LANDMARK_NAMES,
+            'joint_names': self.biomech_analysis.angle_engine.joint_names,
+            'angle_names': self.biomech_analysis.angle_engine.angle_names,
+            'keyframe_interval': KEYFRAME_INTERVAL
+        }
+
+    def subscribe_landmarks(self, subscriber, groups):
+        if self.subscriptions.subscribe(subscriber, groups):
+            self.apply_enabled_groups()
+        return self.subscriptions.groups() | {'pose'}
+
+    def unsubscribe_landmarks(self, subscriber):
+        if self.subscriptions.unsubscribe(subscriber):
+            self.apply_enabled_groups()
+
+    def apply_enabled_groups(self):
+        """Propaga la unión de suscripciones al normalizador, al extractor local y a los procesos de inferencia"""
+        self.normalizer.set_enabled_groups(self.subscriptions.groups())
+        if self._biomech is not None:
+            self._biomech.set_enabled_groups(self.subscriptions.groups())
+        for camera in list(self.cameras.values()):
+            if isinstance(camera['holistic'], ProcessInference):
+                camera['holistic'].set_enabled_groups(self.camera_groups(camera['profile']))
 
     def release_camera(self, camera_id):
         if camera_id in self.cameras:
             try:
-                self.cameras[camera_id]['capture'].release()
-                self.cameras[camera_id]['holistic'].close()
+                camera = self.cameras[camera_id]
+                options = self.holistic_options(camera['profile'])
+                if camera['pipeline'].stop():
+                    self.holistic_pool.release(camera['holistic'], options)
+                else:
+                    # El modelo sigue en uso: vuelve al pool cuando termine la inferencia en curso
+                    print(f"Camera {camera_id} is still processing a frame; its model is released when it ends")
+                    threading.Thread(target=self._release_when_stopped,
+                                     args=(camera['pipeline'], camera['holistic'], options), daemon=True).start()
                 self.active_cameras.remove(camera_id)
                 del self.cameras[camera_id]
+                with self.analysis_lock:
+                    self._drop_sources([camera_id])
                 return True
             except Exception as e:
                 print(f"Error releasing camera {camera_id}: {e}")
         return False
 
+    def _drop_sources(self, source_ids):
+        """Quita fuentes de la fusión (con analysis_lock tomado).
+
+        Sin fuentes, el análisis descarta su estado incremental: el primer frame
+        de la próxima cámara o cliente no se deriva contra uno de minutos atrás.
+        """
+        had_sources = bool(self.all_landmarks)
+        for source_id in source_ids:
+            self.all_landmarks.pop(source_id, None)
+        if had_sources and not self.all_landmarks:
+            self.biomech_analysis.reset_kinematics()
+
+    def release_client_cameras(self, sid):
+        """Libera las cámaras que inició un cliente; las de los demás siguen corriendo"""
+        for camera_id, camera in list(self.cameras.items()):
+            if camera['owner'] == sid:
+                self.release_camera(camera_id)
+
+    def _release_when_stopped(self, pipeline, holistic, options):
+        pipeline.join()
+        self.holistic_pool.release(holistic, options)
+
+class EmgManager:
+    """Adquisición de EMG compartida por todos los visores de la página de EMG.
+
+    La adquisición arranca con el primer visor y se detiene con el último; una
+    tarea de fondo envía a la sala ``emg`` un bloque con las muestras nuevas y
+    sus métricas ``EMG_DISPLAY_RATE`` veces por segundo.
+    """
+
+    ROOM = 'emg'
+
+    def __init__(self):
+        self.acquisition = None
+        self.viewers = set()
+        self._lock = threading.Lock()
+        self._task = None
+
+    def subscribe(self, sid):
+        with self._lock:
+            if self.acquisition is None:
+                if not EMG_SOURCE:
+                    raise ValueError("No EMG source configured (set EMG_SOURCE)")
+                source = open_source(EMG_SOURCE, Config.EMG_SAMPLE_RATE, Config.EMG_BAUDRATE)
+                self.acquisition = EmgAcquisition(
+                    source, Config.EMG_CHANNELS, Config.EMG_SAMPLE_RATE,
+                    rms_window=Config.EMG_RMS_WINDOW, fft_size=Config.EMG_FFT_SIZE,
+                    fatigue_window=Config.EMG_FATIGUE_WINDOW
+                )
+                self.acquisition.start()
+            self.viewers.add(sid)
+            if self._task is None:
+                self._task = socketio.start_background_task(self._emit_loop)
+        join_room(self.ROOM)
+
+    def unsubscribe(self, sid):
+        with self._lock:
+            self.viewers.discard(sid)
+            if self.viewers or self.acquisition is None:
+                return
+            acquisition, self.acquisition = self.acquisition, None
+        acquisition.stop()
+
+    def _emit_loop(self):
+        while True:
+            acquisition = self.acquisition
+            block = acquisition.drain() if acquisition is not None else None
+            if block is not None:
+                socketio.emit('emg_data', block, to=self.ROOM)
+            socketio.sleep(1.0 / Config.EMG_DISPLAY_RATE)
+
+    def window(self, t0, t1):
+        """Muestras de EMG entre ``t0`` y ``t1`` (reloj común), o None si no hay adquisición"""
+        acquisition = self.acquisition
+        return acquisition.window(t0, t1) if acquisition is not None else None
+
+    def stats(self):
+        acquisition = self.acquisition
+        return {
+            'source': EMG_SOURCE,
+            'viewers': len(self.viewers),
+            **(acquisition.stats() if acquisition is not None else {'running': False}),
+        }
+
+
 # Initialize camera manager
 camera_manager = CameraManager()
+atexit.register(camera_manager.shutdown)
+emg_manager = EmgManager()
+# Los procesos de inferencia (spawn) vuelven a importar este módulo: solo precalienta el principal
+if PRELOAD_INFERENCE and multiprocessing.current_process().name == 'MainProcess':
+    camera_manager.preload()
 
 
 # Routes
@@ -167,20 +616,134 @@ def biomechanics_page():
     return render_template('index.html')
 
 
-def generate_frames(camera_id):
-    while True:
-        frame = camera_manager.get_frame(camera_id)
-        if frame is not None:
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if ret:
+@app.route('/topology')
+def topology():
+    """Topología del esqueleto; cacheable por versión (ETag)"""
+    response = jsonify(get_topology())
+    response.set_etag(TOPOLOGY_VERSION)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
+
+@app.route('/stats/emits')
+@login_required
+def emit_stats():
+    """Profundidad de cola y contadores de descarte por cliente"""
+    return jsonify(camera_manager.scheduler.stats())
+
+
+@app.route('/stats/cameras')
+@login_required
+def camera_stats():
+    """Perfil activo y tiempos medidos de cada cámara"""
+    return jsonify({
+        camera_id: camera_manager.camera_status(camera_id)
+        for camera_id in list(camera_manager.cameras)
+    })
+
+
+@app.route('/stats/pool')
+@login_required
+def pool_stats():
+    """Modelos ociosos por configuración y aciertos del pool; vacío mientras MediaPipe no se cargó"""
+    return jsonify(camera_manager.holistic_pool.stats() if camera_manager.loaded else {})
+
+
+@app.route('/stats/video')
+@login_required
+def video_stats():
+    """Visores y frames codificados por cámara"""
+    return jsonify({
+        camera_id: camera['hub'].stats()
+        for camera_id, camera in list(camera_manager.cameras.items())
+    })
+
+
+@app.route('/stats/emg')
+@login_required
+def emg_stats():
+    """Estado de la adquisición de EMG"""
+    return jsonify(emg_manager.stats())
+
+
+@app.route('/sync/window')
+@login_required
+def sync_window():
+    """EMG y cinemática del mismo intervalo del reloj común.
+
+    ``?start=&end=`` en segundos del reloj del servidor; sin ellos, los últimos
+    ``seconds`` (2 por defecto) hasta ahora.
+    """
+    now = CLOCK.now()
+    end = request.args.get('end', now, type=float)
+    start = request.args.get('start', end - request.args.get('seconds', 2.0, type=float), type=float)
+    history = camera_manager.biomech_analysis.history
+    with camera_manager.analysis_lock:
+        kinematics = history.window(start, end)
+    emg = emg_manager.window(start, end)
+    return jsonify({
+        'now': now,
+        'start': start,
+        'end': end,
+        'kinematics': {
+            'joint_names': history.joint_names,
+            **{column: values.tolist() for column, values in kinematics.items()},
+        },
+        'emg': {column: values.tolist() for column, values in emg.items()} if emg is not None else None,
+    })
+
+
+@app.route('/stats/ingest')
+@login_required
+def ingest_stats():
+    """Frames recibidos y desfase de reloj de cada cliente que envía landmarks"""
+    return jsonify({sid: session.stats() for sid, session in list(camera_manager.ingest_sessions.items())})
+
+
+def generate_frames(camera_id, settings=StreamSettings()):
+    stream = AdaptiveStream(settings)
+    hub = None
+    seq = 0
+    last_sent = 0.0
+    try:
+        while True:
+            current = camera_manager.video_hub(camera_id)
+            if current is None or current.results.closed:
+                # Cámara aún no iniciada (o detenida): esperar sin ocupar la CPU
+                sleep(0.05)
+                continue
+            if current is not hub:
+                # Cámara (re)iniciada: la secuencia del nuevo pipeline empieza de cero
+                if hub is not None:
+                    hub.remove_viewer()
+                hub, seq = current, 0
+                hub.add_viewer()
+
+            if stream.fps is not None:
+                # Tasa limitada: esperar el turno y tomar el frame más reciente en ese momento
+                wait = last_sent + stream.interval - monotonic()
+                if wait > 0:
+                    sleep(wait)
+
+            seq, jpeg = hub.next_frame(seq, stream.settings)
+            if jpeg is not None:
+                last_sent = monotonic()
                 yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
+                # El servidor retoma el generador cuando terminó de escribir: si tarda
+                # más que un intervalo, la conexión del visor se está atrasando
+                stream.record_send(monotonic() - last_sent)
+    finally:
+        if hub is not None:
+            hub.remove_viewer()
 
 
 @app.route('/video_feed/<int:camera_id>')
 @login_required
 def video_feed(camera_id):
-    return Response(generate_frames(camera_id),
+    """MJPEG de la cámara; ``?preset=high|medium|low|minimal&quality=&scale=&fps=&adaptive=0`` por visor"""
+    return Response(generate_frames(camera_id, StreamSettings.from_args(request.args)),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
@@ -188,22 +751,83 @@ def video_feed(camera_id):
 @socketio.on('start_camera')
 def handle_start_camera(data):
     camera_id = int(data.get('camera_id'))
-    if camera_manager.add_camera(camera_id):
+    if camera_manager.add_camera(camera_id, owner=request.sid):
         emit('camera_started', {'camera_id': camera_id})
+        emit('camera_profile', camera_manager.camera_status(camera_id))
 
 
 @socketio.on('connect')
 def handle_connect():
+    camera_manager.add_client(request.sid)
     if not current_user.is_authenticated:
         return
     print('Client connected')
+    emit('topology', get_topology())
+
+
+@socketio.on('subscribe_landmarks')
+def handle_subscribe_landmarks(data):
+    try:
+        groups = camera_manager.subscribe_landmarks(request.sid, data.get('groups', []))
+    except ValueError as e:
+        emit('subscription_error', {'error': str(e)})
+        return
+    emit('landmarks_subscribed', {'groups': sorted(groups)})
+
+
+@socketio.on('set_encoding')
+def handle_set_encoding(data):
+    encoding = data.get('encoding', 'json')
+    if encoding == 'binary' and data.get('delta'):
+        encoding = 'binary_delta'
+    try:
+        camera_manager.set_client_encoding(request.sid, encoding)
+    except ValueError as e:
+        emit('encoding_error', {'error': str(e)})
+        return
+    if encoding != 'json':
+        emit('binary_schema', camera_manager.get_binary_schema())
+
+
+@socketio.on('set_rate')
+def handle_set_rate(data):
+    try:
+        camera_manager.set_client_rate(
+            request.sid, float(data.get('max_rate')), data.get('stream'), data.get('camera_id')
+        )
+    except (TypeError, ValueError) as e:
+        emit('rate_error', {'error': str(e)})
+
+
+@socketio.on('subscribe_stream')
+def handle_subscribe_stream(data):
+    try:
+        room = camera_manager.subscribe_stream(
+            request.sid, data.get('stream', 'merged'), data.get('camera_id'),
+            float(data.get('max_rate', 30.0))
+        )
+    except (TypeError, ValueError) as e:
+        emit('stream_error', {'error': str(e)})
+        return
+    emit('stream_subscribed', {'room': room})
+
+
+@socketio.on('unsubscribe_stream')
+def handle_unsubscribe_stream(data):
+    try:
+        room = camera_manager.unsubscribe_stream(request.sid, data.get('stream', 'merged'), data.get('camera_id'))
+    except (TypeError, ValueError) as e:
+        emit('stream_error', {'error': str(e)})
+        return
+    emit('stream_unsubscribed', {'room': room})
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print('Client disconnected')
-    for camera_id in list(camera_manager.active_cameras):
-        camera_manager.release_camera(camera_id)
+    camera_manager.remove_client(request.sid)
+    emg_manager.unsubscribe(request.sid)
+    camera_manager.release_client_cameras(request.sid)
 
 @socketio.on('stop_camera')
 def handle_stop_camera(data):
@@ -211,6 +835,74 @@ def handle_stop_camera(data):
     if camera_manager.release_camera(camera_id):
         emit('camera_stopped', {'camera_id': camera_id})
 
+@socketio.on('start_recording')
+def handle_start_recording():
+    """Graba en disco los landmarks y la cinemática del análisis de las cámaras del servidor"""
+    if not current_user.is_authenticated:
+        return {'error': 'Login required'}
+    path = os.path.join(Config.RECORDINGS_DIR, strftime('%Y%m%d-%H%M%S'))
+    try:
+        with camera_manager.analysis_lock:
+            camera_manager.biomech_analysis.start_recording(path)
+    except OSError as e:
+        return {'error': str(e)}
+    emit('recording_started', {'path': path})
+    return {'path': path}
+
+
+@socketio.on('stop_recording')
+def handle_stop_recording():
+    if not current_user.is_authenticated:
+        return {'error': 'Login required'}
+    with camera_manager.analysis_lock:
+        camera_manager.biomech_analysis.stop_recording()
+    emit('recording_stopped', {})
+    return {}
+
+@socketio.on('subscribe_emg')
+def handle_subscribe_emg():
+    try:
+        emg_manager.subscribe(request.sid)
+    except (OSError, ValueError) as e:
+        emit('emg_error', {'error': str(e)})
+        return
+    emit('emg_subscribed', {
+        'channels': Config.EMG_CHANNELS,
+        'sample_rate': Config.EMG_SAMPLE_RATE,
+        'display_rate': Config.EMG_DISPLAY_RATE,
+    })
+
+
+@socketio.on('unsubscribe_emg')
+def handle_unsubscribe_emg():
+    leave_room(EmgManager.ROOM)
+    emg_manager.unsubscribe(request.sid)
+
+@socketio.on('ingest_landmarks')
+def handle_ingest_landmarks(batch):
+    """Lote de landmarks de MediaPipe calculados en el navegador; la respuesta va en el ack"""
+    if not isinstance(batch, dict):
+        return {'error': 'A landmark batch must be an object'}
+    # Solo un usuario autenticado puede alimentar el análisis compartido con las cámaras del servidor
+    shared = bool(batch.get('shared')) and current_user.is_authenticated
+    try:
+        return camera_manager.ingest_landmarks(request.sid, batch, shared)
+    except (AttributeError, TypeError, ValueError) as e:
+        return {'error': str(e)}
+
+@app.route('/stats/startup')
+@login_required
+def startup_stats():
+    """Tiempos de arranque por etapa, en segundos"""
+    times = dict(STARTUP_TIMES)
+    if camera_manager.loaded and camera_manager.holistic_pool.prewarm_time is not None:
+        times['prewarm'] = camera_manager.holistic_pool.prewarm_time
+    return jsonify(times)
+
+
+STARTUP_TIMES['app'] = perf_counter() - BOOT_STARTED
+print("Startup: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in STARTUP_TIMES.items()))
+
 if __name__ == '__main__':
     # Get port from environment variable (Render sets this automatically)
     port = int(os.environ.get('PORT', 5000))
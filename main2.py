@@ -77,29 +77,32 @@ class CameraManager:
                         self.cameras[camera_id]['holistic']
                     )
 
-                    if landmarks:
+                    if landmarks is not None:
                         self.all_landmarks[camera_id] = landmarks
 
                         if len(self.active_cameras) > 1:
                             merged_landmarks = self.biomech.merge_landmarks(self.all_landmarks)
-                            if merged_landmarks:
+                            if merged_landmarks is not None:
                                 current_angles = self.biomech_analysis.update_points_from_avatar(merged_landmarks)
-                                socketio.emit('data_update', {
-                                    'landmarks': merged_landmarks,
-                                    'angles': current_angles
-                                })
+                                self.emit_data_update(merged_landmarks, current_angles)
                         else:
                             current_angles = self.biomech_analysis.update_points_from_avatar(landmarks)
-                            socketio.emit('data_update', {
-                                'landmarks': landmarks,
-                                'angles': current_angles
-                            })
+                            self.emit_data_update(landmarks, current_angles)
 
                     return processed_frame
             except Exception as e:
                 print(f"Error processing frame: {e}")
         return None
 
+    def emit_data_update(self, landmarks, angles):
+        """Convierte el LandmarkFrame a la forma JSON solo al emitir por Socket.IO"""
+        payload = landmarks.to_dict()
+        payload['connections'] = self.biomech.get_connections()
+        socketio.emit('data_update', {
+            'landmarks': payload,
+            'angles': angles
+        })
+
     def release_camera(self, camera_id):
         if camera_id in self.cameras:
             try:
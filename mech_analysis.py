@@ -1,9 +1,14 @@
 #mech_analysis.py
 import numpy as np
-import kineticstoolkit as ktk
 from dataclasses import dataclass
-from typing import Dict, List, Optional
-from time import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+from timebase import CLOCK
+from joint_history import JointHistory
+from session_store import SessionWriter
+from landmarks import LandmarkFrame, LANDMARK_INDEX, group_landmark_names, landmark_group
+
+if TYPE_CHECKING:
+    import kineticstoolkit as ktk
 
 @dataclass
 class SegmentPair:
@@ -12,21 +17,196 @@ class SegmentPair:
     rotation_sequence: str
     joint_name: str
 
-@dataclass
-class JointAngles:
-    angles: Dict[str, float]
-    angular_velocity: Dict[str, float]
-    angular_acceleration: Dict[str, float]
-    time: float
+class LandmarkRingBuffer:
+    """Buffer circular de capacidad fija para los landmarks de la ventana de análisis.
+
+    Guarda un único arreglo ``(capacity, n_landmarks, 4)`` y un anillo de tiempos
+    que se escriben en su lugar en cada frame. Solo se copian las filas del
+    LandmarkFrame que corresponden a ``landmark_names``. Los landmarks ausentes quedan en NaN
+    (convención de kineticstoolkit) y la cuarta columna vale 1.0 solo si el punto
+    estuvo presente. ``predicted`` marca los frames extrapolados.
+    """
+
+    def __init__(self, landmark_names: List[str], capacity: int):
+        self.landmark_names = list(landmark_names)
+        self.landmark_index = {name: i for i, name in enumerate(self.landmark_names)}
+        self.frame_rows = np.array([LANDMARK_INDEX[name] for name in self.landmark_names], dtype=np.intp)
+        self.capacity = capacity
+        self.data = np.full((capacity, len(self.landmark_names), 4), np.nan)
+        self.time = np.zeros(capacity)
+        self.predicted = np.zeros(capacity, dtype=bool)
+        self.head = 0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, timestamp: float, frame: LandmarkFrame):
+        """Escribe un frame en la posición siguiente del anillo"""
+        slot = self.data[self.head]
+        present = frame.present[self.frame_rows]
+        slot[:, :3] = frame.data[self.frame_rows, :3]
+        slot[~present, :3] = np.nan
+        slot[:, 3] = present
+
+        self.time[self.head] = timestamp
+        self.predicted[self.head] = frame.predicted
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def _slot(self, frame_idx: int) -> int:
+        """Convierte un índice cronológico (admite negativos) en la posición del anillo"""
+        if frame_idx < 0:
+            frame_idx += self.count
+        if not 0 <= frame_idx < self.count:
+            raise IndexError(f"frame {frame_idx} out of range for {self.count} frames")
+        return (self.head - self.count + frame_idx) % self.capacity
+
+    def frame(self, frame_idx: int) -> np.ndarray:
+        """Vista ``(n_landmarks, 4)`` de un frame en orden cronológico"""
+        return self.data[self._slot(frame_idx)]
+
+    def last_time(self) -> Optional[float]:
+        return float(self.time[self._slot(-1)]) if self.count else None
+
+    def ordered_slots(self) -> np.ndarray:
+        return (self.head - self.count + np.arange(self.count)) % self.capacity
+
+    def ordered_time(self) -> np.ndarray:
+        return self.time[self.ordered_slots()]
+
+    def ordered_data(self) -> np.ndarray:
+        return self.data[self.ordered_slots()]
+
+    def to_timeseries(self) -> 'ktk.TimeSeries':
+        """Construye una ktk.TimeSeries con la ventana actual en orden cronológico"""
+        # kineticstoolkit tarda segundos en importarse y solo se usa en esta vista
+        import kineticstoolkit as ktk
+
+        points = ktk.TimeSeries()
+        points.time = self.ordered_time()
+        data = self.ordered_data()
+        for idx, name in enumerate(self.landmark_names):
+            points.data[name] = data[:, idx, :]
+        return points
+
+
+class JointAngleEngine:
+    """Calcula los ángulos de Euler de todas las articulaciones en un solo paso vectorizado.
+
+    Los nombres de los segmentos se traducen una sola vez a una tabla de índices
+    ``(n_joints, 4)`` sobre el eje de landmarks del buffer; cada actualización
+    reúne los puntos de todos los frames y articulaciones en un único arreglo.
+    """
+
+    def __init__(self, segment_pairs: Dict[str, SegmentPair], landmark_index: Dict[str, int]):
+        self.joint_names = list(segment_pairs.keys())
+        self.index_table = np.array([
+            [landmark_index[name] for name in (*pair.proximal.split(':'), *pair.distal.split(':'))]
+            for pair in segment_pairs.values()
+        ], dtype=np.intp)
+        self.yxy_mask = np.array([
+            pair.rotation_sequence.lower() == 'yxy' for pair in segment_pairs.values()
+        ])
+        self.angle_names = [
+            ['Plane', 'Elevation', 'Rotation'] if is_yxy else ['Flexion', 'Abduction', 'Rotation']
+            for is_yxy in self.yxy_mask
+        ]
+
+    @staticmethod
+    def _cross(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Producto cruz sobre el último eje (np.cross es lento para arreglos pequeños)"""
+        return np.stack([
+            a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1],
+            a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2],
+            a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0],
+        ], axis=-1)
+
+    @staticmethod
+    def _normalize(v: np.ndarray) -> np.ndarray:
+        return v / np.sqrt(np.einsum('...i,...i->...', v, v))[..., None]
+
+    @classmethod
+    def _segment_rotations(cls, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """Matrices de rotación ``(..., 3, 3)`` con el eje Z a lo largo de cada segmento"""
+        z_axis = cls._normalize(end - start)
+
+        # Vector auxiliar para el producto cruz: X si el segmento es casi vertical
+        temp = np.zeros_like(z_axis)
+        vertical = np.abs(z_axis[..., 1]) > 0.9
+        temp[..., 0] = vertical
+        temp[..., 1] = ~vertical
+
+        y_axis = cls._normalize(cls._cross(z_axis, temp))
+        x_axis = cls._cross(y_axis, z_axis)
+
+        return np.stack([x_axis, y_axis, z_axis], axis=-1)
+
+    def _matrix_to_euler_angles(self, matrix: np.ndarray) -> np.ndarray:
+        """Convierte matrices ``(..., n_joints, 3, 3)`` en ángulos de Euler en grados"""
+        angles = np.empty(matrix.shape[:-1])
+
+        # Secuencia XYZ
+        angles[..., 0] = np.arctan2(matrix[..., 2, 1], matrix[..., 2, 2])
+        angles[..., 1] = np.arcsin(np.clip(-matrix[..., 2, 0], -1.0, 1.0))
+        angles[..., 2] = np.arctan2(matrix[..., 1, 0], matrix[..., 0, 0])
+
+        # Secuencia YXY
+        if self.yxy_mask.any():
+            yxy = matrix[..., self.yxy_mask, :, :]
+            angles[..., self.yxy_mask, 0] = np.arctan2(yxy[..., 0, 1], -yxy[..., 2, 1])
+            angles[..., self.yxy_mask, 1] = np.arccos(np.clip(yxy[..., 1, 1], -1.0, 1.0))
+            angles[..., self.yxy_mask, 2] = np.arctan2(yxy[..., 1, 0], yxy[..., 1, 2])
+
+        return np.degrees(angles)
+
+    def compute(self, data: np.ndarray, slots: np.ndarray) -> np.ndarray:
+        """Ángulos ``(n_frames, n_joints, 3)`` para los frames ``slots`` de ``data``.
+
+        Los frames con algún landmark ausente o segmento degenerado devuelven NaN.
+        """
+        points = data[slots[:, None, None], self.index_table[None, :, :], :3]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Segmentos proximal y distal en el mismo paso: (n_frames, n_joints, 2, 3, 3)
+            rotations = self._segment_rotations(points[:, :, 0::2], points[:, :, 1::2])
+
+            # La inversa de una rotación es su transpuesta
+            relative = np.swapaxes(rotations[:, :, 0], -1, -2) @ rotations[:, :, 1]
+
+            return self._matrix_to_euler_angles(relative)
+
+    def to_dict(self, joint_idx: int, values: np.ndarray) -> Dict[str, float]:
+        return dict(zip(self.angle_names[joint_idx], values.tolist()))
+
 
 class BiomechanicalAnalysis:
-    def __init__(self):
-        self.points = self._initialize_ktk_components()
+    def __init__(self, time_window: int = 5, incremental: bool = True, history_size: int = 9000,
+                 retention: str = 'ring', max_age: Optional[float] = None, spill_dir: Optional[str] = None):
+        self.time_window = time_window
+        self.incremental = incremental
         self.segment_pairs = self._define_segment_pairs()
-        self.joint_data: Dict[str, List[JointAngles]] = {}
-        self.time_window = 5
-        self.start_time = time()
-        self.frame_times = []
+        self.required_groups = self._segment_groups(self.segment_pairs)
+        self.buffer = self._initialize_ktk_components()
+        self.angle_engine = JointAngleEngine(self.segment_pairs, self.buffer.landmark_index)
+        self.history = JointHistory(
+            self.angle_engine.joint_names,
+            capacity=history_size,
+            retention=retention,
+            max_age=max_age,
+            spill_dir=spill_dir
+        )
+        self.recorder: Optional[SessionWriter] = None
+
+        # Estado del modo incremental: último frame analizado y su velocidad
+        self._prev_time: Optional[float] = None
+        self._prev_angles: Optional[np.ndarray] = None
+        self._prev_velocities: Optional[np.ndarray] = None
+
+    @property
+    def points(self) -> 'ktk.TimeSeries':
+        """Vista ktk.TimeSeries de la ventana actual (se construye solo bajo demanda)"""
+        return self.buffer.to_timeseries()
 
 
     @staticmethod
@@ -117,68 +297,39 @@ class BiomechanicalAnalysis:
             )
             }
 
-    def _initialize_ktk_components(self) -> ktk.TimeSeries:
-        """Inicializa la serie temporal para análisis biomecánico"""
-        points = ktk.TimeSeries()
-        points.time = np.array([], dtype=float)
-
-        key_points = {
-            "pose": range(33),
-            "left_hand": range(21),
-            "right_hand": range(21),
-            "face": range(468)
-        }
+    @staticmethod
+    def _segment_groups(segment_pairs: Dict[str, SegmentPair]) -> frozenset:
+        """Grupos de landmarks que usan los pares de segmentos"""
+        return frozenset(
+            landmark_group(name)
+            for pair in segment_pairs.values()
+            for segment in (pair.proximal, pair.distal)
+            for name in segment.split(':')
+        )
+
+    def _initialize_ktk_components(self) -> LandmarkRingBuffer:
+        """Inicializa el buffer con los landmarks de los grupos que usa el análisis"""
+        return LandmarkRingBuffer(group_landmark_names(self.required_groups), self.time_window)
+
+    def update_points_from_avatar(self, landmarks: LandmarkFrame):
+        """Actualiza los puntos desde los landmarks del avatar"""
+        try:
+            if isinstance(landmarks, dict):
+                landmarks = LandmarkFrame.from_dict(landmarks)
 
-        for category, range_val in key_points.items():
-            for i in range_val:
-                points.data[f"{category}_{i}"] = np.zeros((0, 4))
+            # Instante de captura en el reloj común; los frames sin sello (p. ej. desde un dict) usan el actual
+            current_time = landmarks.timestamp if landmarks.timestamp is not None else CLOCK.now()
 
-        return points
+            # Los tiempos del buffer deben crecer: un frame fusionado con una captura más vieja que la
+            # última analizada se corre 1 ms para no romper el orden ni dividir por dt = 0
+            last_time = self.buffer.last_time()
+            if last_time is not None and current_time <= last_time:
+                current_time = last_time + 0.001
 
-    def update_points_from_avatar(self, landmarks_3d: dict):
-        """Actualiza los puntos desde los landmarks del avatar"""
-        try:
-            # Generate unique timestamp
-            current_time = time() - self.start_time
-
-            # Ensure the time is unique
-            while current_time in self.frame_times:
-                current_time += 0.001  # Add 1ms if duplicate
-
-            self.frame_times.append(current_time)
-
-            # Create new frame data
-            new_frame_data = {}
-            for key, value in landmarks_3d.items():
-                if isinstance(value, dict) and all(k in value for k in ['x', 'y', 'z']):
-                    new_frame_data[key] = np.array([[
-                        float(value['x']),
-                        float(value['y']),
-                        float(value['z']),
-                        1.0
-                    ]])
-
-            # Update TimeSeries with new time point
-            self.points.time = np.append(self.points.time, current_time)
-
-            # Update data for each landmark
-            for key, value in new_frame_data.items():
-                if key in self.points.data:
-                    if self.points.data[key].shape[0] == 0:
-                        self.points.data[key] = value
-                    else:
-                        self.points.data[key] = np.vstack([self.points.data[key], value])
-                else:
-                    self.points.data[key] = value
-
-            # Maintain time window
-            if len(self.points.time) > self.time_window:
-                keep_idx = -self.time_window
-                self.points.time = self.points.time[keep_idx:]
-                self.frame_times = self.frame_times[keep_idx:]
-                for key in self.points.data:
-                    if len(self.points.data[key]) > 0:
-                        self.points.data[key] = self.points.data[key][keep_idx:]
+            # Write the frame in place; the ring keeps only the time window
+            self.buffer.append(current_time, landmarks)
+            if self.recorder is not None:
+                self.recorder.append_landmarks(current_time, self.buffer.frame(-1), landmarks.predicted)
 
             # Analyze and return current angles
             self.analyze_all_segments()
@@ -189,188 +340,132 @@ class BiomechanicalAnalysis:
             return {}
 
 
-    def _create_transform_from_points(self, start_point: np.ndarray, end_point: np.ndarray) -> np.ndarray:
-        """Creates a transformation matrix from two points"""
-        # Calculate primary axis (Z)
-        z_axis = end_point - start_point
-        z_axis = z_axis / np.linalg.norm(z_axis)
-
-        # Calculate temporary vector for cross product
-        temp = np.array([1, 0, 0]) if abs(z_axis[1]) > 0.9 else np.array([0, 1, 0])
-
-        # Calculate Y axis
-        y_axis = np.cross(z_axis, temp)
-        y_axis = y_axis / np.linalg.norm(y_axis)
-
-        # Calculate X axis
-        x_axis = np.cross(y_axis, z_axis)
-
-        # Create transformation matrix
-        transform = np.eye(4)
-        transform[:3, 0] = x_axis
-        transform[:3, 1] = y_axis
-        transform[:3, 2] = z_axis
-        transform[:3, 3] = start_point
-
-        return transform
-
-    def _get_segment_vector(self, segment_def: str, frame_idx: int) -> np.ndarray:
-        """Obtiene el vector de un segmento y lo normaliza"""
-        try:
-            start_point, end_point = segment_def.split(':')
-            start_coords = self.points.data[start_point][frame_idx, :3]  # Changed indexing
-            end_coords = self.points.data[end_point][frame_idx, :3]  # Changed indexing
-
-            vector = end_coords - start_coords
-            norm = np.linalg.norm(vector)
-
-            if norm < 1e-10:  # Check for very small values
-                return np.zeros(3)
-
-            return vector / norm
-
-        except Exception as e:
-            print(f"Error getting segment vector for {segment_def}: {str(e)}")
-            return np.zeros(3)
-
-
     def get_current_angles(self) -> dict:
         """Obtiene los ángulos actuales"""
+        slot = self.history.latest_slot()
+        if slot is None:
+            return {}
+
+        angles = self.history.angles[slot]
+        velocities = self.history.velocities[slot]
+        accelerations = self.history.accelerations[slot]
         return {
             joint_name: {
-                'angles': joint_data[-1].angles,
-                'velocities': joint_data[-1].angular_velocity,
-                'accelerations': joint_data[-1].angular_acceleration
-            } if joint_data else {
-                'angles': {'Flexion': 0.0, 'Abduction': 0.0, 'Rotation': 0.0},
-                'velocities': {'Flexion': 0.0, 'Abduction': 0.0, 'Rotation': 0.0},
-                'accelerations': {'Flexion': 0.0, 'Abduction': 0.0, 'Rotation': 0.0}
+                'angles': self.angle_engine.to_dict(joint_idx, angles[joint_idx]),
+                'velocities': self.angle_engine.to_dict(joint_idx, velocities[joint_idx]),
+                'accelerations': self.angle_engine.to_dict(joint_idx, accelerations[joint_idx])
             }
-            for joint_name, joint_data in self.joint_data.items()
+            for joint_idx, joint_name in enumerate(self.angle_engine.joint_names)
         }
 
+    def is_current_predicted(self) -> bool:
+        """True si los ángulos actuales salen de landmarks extrapolados y no inferidos"""
+        slot = self.history.latest_slot()
+        return slot is not None and bool(self.history.predicted[slot])
 
+    def get_current_kinematics(self) -> Optional[np.ndarray]:
+        """Ángulos, velocidades y aceleraciones actuales como arreglo ``(3, n_joints, 3)``"""
+        slot = self.history.latest_slot()
+        if slot is None:
+            return None
+        return np.stack([
+            self.history.angles[slot],
+            self.history.velocities[slot],
+            self.history.accelerations[slot]
+        ])
+
+    def _window_kinematics(self):
+        """Recalcula ángulos, velocidades y aceleraciones sobre toda la ventana"""
+        if len(self.buffer) < 2:
+            return None
 
-    def calculate_euler_angles(self, pair: SegmentPair, frame_idx: int) -> Dict[str, float]:
-        """Calcula los ángulos de Euler"""
-        try:
-            # Get start and end points for both segments
-            prox_start, prox_end = pair.proximal.split(':')
-            dist_start, dist_end = pair.distal.split(':')
-
-            # Get point coordinates
-            prox_start_coords = self.points.data[prox_start][frame_idx, :3]
-            prox_end_coords = self.points.data[prox_end][frame_idx, :3]
-            dist_start_coords = self.points.data[dist_start][frame_idx, :3]
-            dist_end_coords = self.points.data[dist_end][frame_idx, :3]
-
-            # Create transformation matrices
-            prox_transform = self._create_transform_from_points(prox_start_coords, prox_end_coords)
-            dist_transform = self._create_transform_from_points(dist_start_coords, dist_end_coords)
-
-            # Calculate relative transformation
-            relative_transform = np.linalg.inv(prox_transform) @ dist_transform
+        slots = self.buffer.ordered_slots()
+        times = self.buffer.time[slots]
 
-            # Convert to Euler angles based on sequence
-            angles = self._matrix_to_euler_angles(relative_transform, pair.rotation_sequence)
+        # Un solo paso para todas las articulaciones y todos los frames de la ventana
+        angles = self.angle_engine.compute(self.buffer.data, slots)
+        angles = np.nan_to_num(angles, nan=0.0, posinf=0.0, neginf=0.0)
 
-            # Assign names based on sequence
-            angle_names = ['Flexion', 'Abduction', 'Rotation']
-            if pair.rotation_sequence.lower() == 'yxy':
-                angle_names = ['Plane', 'Elevation', 'Rotation']
+        # Calculate velocities and accelerations using time differences
+        dt = times[-1] - times[-2]
+        velocities = (angles[-1] - angles[-2]) / dt
+        accelerations = np.zeros_like(velocities)
+        if len(times) > 2:
+            prev_velocities = (angles[-2] - angles[-3]) / (times[-2] - times[-3])
+            accelerations = (velocities - prev_velocities) / dt
 
-            return dict(zip(angle_names, angles))
+        return float(times[-1]), angles[-1], velocities, accelerations
 
-        except Exception as e:
-            print(f"Error calculating angles for {pair.joint_name}: {str(e)}")
-            return {name: 0.0 for name in ['Flexion', 'Abduction', 'Rotation']}
-
-    def _matrix_to_euler_angles(self, matrix: np.ndarray, sequence: str) -> np.ndarray:
-        """Convert rotation matrix to Euler angles"""
-        # Simple implementation for XYZ sequence (can be expanded for other sequences)
-        angles = np.zeros(3)
-
-        if sequence.lower() == 'xyz':
-            angles[1] = np.arcsin(-matrix[2, 0])
-            angles[0] = np.arctan2(matrix[2, 1], matrix[2, 2])
-            angles[2] = np.arctan2(matrix[1, 0], matrix[0, 0])
-        elif sequence.lower() == 'yxy':
-            angles[1] = np.arccos(matrix[1, 1])
-            angles[0] = np.arctan2(matrix[0, 1], -matrix[2, 1])
-            angles[2] = np.arctan2(matrix[1, 0], matrix[1, 2])
-
-        # Convert to degrees
-        return np.degrees(angles)
-
-    def calculate_angular_kinematics(self, pair: SegmentPair) -> Optional[JointAngles]:
-        """Calcula la cinemática angular"""
-        if len(self.points.time) < 2:
+    def _incremental_kinematics(self):
+        """Calcula solo el frame más reciente usando el estado guardado del anterior"""
+        if len(self.buffer) == 0:
             return None
 
-        try:
-            # Get subset of data for analysis
-            end_idx = len(self.points.time) - 1
-            start_idx = max(0, end_idx - min(self.time_window, end_idx))
-
-            # Calculate angles for frames in window
-            angles_data = []
-            times = self.points.time[start_idx:end_idx + 1]
-
-            for i in range(len(times)):
-                angles = self.calculate_euler_angles(pair, start_idx + i)
-                angles_data.append(angles)
-
-            if not angles_data:
-                return None
-
-            latest_angles = angles_data[-1]
-
-            # Calculate velocities and accelerations using time differences
-            velocities = {k: 0.0 for k in latest_angles.keys()}
-            accelerations = {k: 0.0 for k in latest_angles.keys()}
-
-            if len(angles_data) > 1:
-                dt = times[-1] - times[-2]
-                for k in latest_angles.keys():
-                    velocities[k] = (angles_data[-1][k] - angles_data[-2][k]) / dt
-
-                    if len(angles_data) > 2:
-                        prev_dt = times[-2] - times[-3]
-                        prev_vel = (angles_data[-2][k] - angles_data[-3][k]) / prev_dt
-                        accelerations[k] = (velocities[k] - prev_vel) / dt
-
-            return JointAngles(
-                angles=latest_angles,
-                angular_velocity=velocities,
-                angular_acceleration=accelerations,
-                time=float(times[-1])
-            )
-
-        except Exception as e:
-            print(f"Error in kinematics calculation for {pair.joint_name}: {str(e)}")
-            return None
+        slots = self.buffer.ordered_slots()[-1:]
+        current_time = float(self.buffer.time[slots[0]])
+        angles = self.angle_engine.compute(self.buffer.data, slots)[0]
+        angles = np.nan_to_num(angles, nan=0.0, posinf=0.0, neginf=0.0)
+
+        result = None
+        velocities = None
+        if self._prev_angles is not None:
+            dt = current_time - self._prev_time
+            velocities = (angles - self._prev_angles) / dt
+            accelerations = np.zeros_like(velocities)
+            if self._prev_velocities is not None:
+                accelerations = (velocities - self._prev_velocities) / dt
+            result = current_time, angles, velocities, accelerations
+
+        self._prev_time = current_time
+        self._prev_angles = angles
+        self._prev_velocities = velocities
+        return result
+
+    def reset_kinematics(self):
+        """Descarta el estado incremental (p. ej. tras un corte en el flujo de frames)"""
+        self._prev_time = None
+        self._prev_angles = None
+        self._prev_velocities = None
 
     def analyze_all_segments(self):
         """Analiza todos los segmentos"""
-        for joint_name, segment_pair in self.segment_pairs.items():
-            joint_kinematics = self.calculate_angular_kinematics(segment_pair)
-            if joint_kinematics:
-                if joint_name not in self.joint_data:
-                    self.joint_data[joint_name] = []
-                self.joint_data[joint_name].append(joint_kinematics)
+        if self.incremental:
+            kinematics = self._incremental_kinematics()
+        else:
+            kinematics = self._window_kinematics()
+        if kinematics is None:
+            return
+
+        predicted = bool(self.buffer.predicted[self.buffer.ordered_slots()[-1]])
+        self.history.append(*kinematics, predicted=predicted)
+        if self.recorder is not None:
+            self.recorder.append_kinematics(*kinematics, predicted=predicted)
+
+    def _open_session(self, output_path: str) -> SessionWriter:
+        return SessionWriter(
+            output_path,
+            joint_names=self.angle_engine.joint_names,
+            angle_names=self.angle_engine.angle_names,
+            landmark_names=self.buffer.landmark_names
+        )
+
+    def start_recording(self, output_path: str):
+        """Empieza a guardar landmarks y cinemática en disco mientras la sesión está activa"""
+        self.stop_recording()
+        self.recorder = self._open_session(output_path)
+
+    def stop_recording(self):
+        """Cierra la grabación en curso, si existe"""
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.close()
 
     def save_analysis(self, output_path: str):
-        """Guarda los resultados del análisis"""
-        analysis_data = {
-            joint_name: [
-                {
-                    "time": kinematics.time,
-                    "angles": kinematics.angles,
-                    "angular_velocity": kinematics.angular_velocity,
-                    "angular_acceleration": kinematics.angular_acceleration
-                }
-                for kinematics in joint_data
-            ]
-            for joint_name, joint_data in self.joint_data.items()
-        }
-
+        """Guarda los resultados del análisis, incluidos los bloques que el historial volcó a disco"""
+        writer = self._open_session(output_path)
+        for columns in self.history.chunks():
+            records = np.empty(len(columns['time']), dtype=writer.dtypes['kinematics'])
+            for field, values in columns.items():
+                records[field] = values
+            writer.append_block('kinematics', records)
+        writer.close()
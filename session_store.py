@@ -0,0 +1,167 @@
+#session_store.py
+import json
+import os
+import queue
+import threading
+import numpy as np
+from time import time
+from typing import Dict, List, Optional
+from timebase import CLOCK, sorted_nearest, sorted_range
+
+SESSION_FORMAT_VERSION = 2
+HEADER_FILE = 'header.json'
+
+
+def kinematics_dtype(n_joints: int) -> np.dtype:
+    return np.dtype([
+        ('time', '<f8'),
+        ('angles', '<f4', (n_joints, 3)),
+        ('velocities', '<f4', (n_joints, 3)),
+        ('accelerations', '<f4', (n_joints, 3)),
+        ('predicted', '?'),
+    ])
+
+
+def landmarks_dtype(n_landmarks: int) -> np.dtype:
+    return np.dtype([
+        ('time', '<f8'),
+        ('data', '<f4', (n_landmarks, 4)),
+        ('predicted', '?'),
+    ])
+
+
+class SessionWriter:
+    """Escribe una sesión como logs binarios de registros de tamaño fijo.
+
+    La sesión es un directorio con un ``header.json`` pequeño (nombres y dtypes)
+    y un archivo ``<stream>.bin`` por flujo (``kinematics`` y ``landmarks``) al
+    que solo se agregan registros. Las escrituras ocurren en un hilo propio; si
+    la cola se llena, el frame se descarta y se cuenta en ``dropped`` para no
+    bloquear el bucle de captura. Abrir una sesión en un directorio que ya
+    tiene una la reemplaza.
+    """
+
+    def __init__(self, path: str, joint_names: List[str], angle_names: List[List[str]],
+                 landmark_names: List[str], queue_size: int = 256):
+        self.path = path
+        self.dtypes = {
+            'kinematics': kinematics_dtype(len(joint_names)),
+            'landmarks': landmarks_dtype(len(landmark_names)),
+        }
+        self.dropped = 0
+        self.written = {stream: 0 for stream in self.dtypes}
+
+        os.makedirs(path, exist_ok=True)
+        header = {
+            'version': SESSION_FORMAT_VERSION,
+            'created': time(),
+            # Los tiempos de los registros son segundos del reloj común desde este instante de pared
+            'clock_origin': CLOCK.wall_origin,
+            'joint_names': list(joint_names),
+            'angle_names': [list(names) for names in angle_names],
+            'landmark_names': list(landmark_names),
+            'streams': {
+                stream: {'file': f"{stream}.bin", 'dtype': dtype.descr}
+                for stream, dtype in self.dtypes.items()
+            },
+        }
+        with open(os.path.join(path, HEADER_FILE), 'w') as f:
+            json.dump(header, f)
+
+        self._files = {
+            stream: open(os.path.join(path, f"{stream}.bin"), 'wb')
+            for stream in self.dtypes
+        }
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name=f"session-writer-{os.path.basename(path)}", daemon=True)
+        self._thread.start()
+
+    def _enqueue(self, stream: str, record: np.ndarray):
+        try:
+            self._queue.put_nowait((stream, record))
+        except queue.Full:
+            self.dropped += 1
+
+    def append_kinematics(self, timestamp: float, angles: np.ndarray, velocities: np.ndarray,
+                          accelerations: np.ndarray, predicted: bool = False):
+        record = np.empty(1, dtype=self.dtypes['kinematics'])
+        record['time'] = timestamp
+        record['angles'] = angles
+        record['velocities'] = velocities
+        record['accelerations'] = accelerations
+        record['predicted'] = predicted
+        self._enqueue('kinematics', record)
+
+    def append_landmarks(self, timestamp: float, data: np.ndarray, predicted: bool = False):
+        record = np.empty(1, dtype=self.dtypes['landmarks'])
+        record['time'] = timestamp
+        record['data'] = data
+        record['predicted'] = predicted
+        self._enqueue('landmarks', record)
+
+    def append_block(self, stream: str, records: np.ndarray):
+        """Encola un bloque ya armado con el dtype del flujo (p. ej. el historial retenido)"""
+        self._queue.put((stream, records.astype(self.dtypes[stream], copy=False)))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            pending = [item]
+            # Agrupar lo que ya esté en cola en una sola escritura por flujo
+            while item is not None:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                pending.append(item)
+
+            for entry in pending:
+                if entry is None:
+                    continue
+                stream, records = entry
+                self._files[stream].write(records.tobytes())
+                self.written[stream] += len(records)
+            for f in self._files.values():
+                f.flush()
+
+            if pending[-1] is None:
+                return
+
+    def close(self):
+        """Vacía la cola, espera al hilo escritor y cierra los archivos"""
+        self._queue.put(None)
+        self._thread.join()
+        for f in self._files.values():
+            f.close()
+
+
+def load_session(path: str) -> Dict[str, object]:
+    """Abre una sesión guardada con np.memmap (sin copiar los datos a memoria)"""
+    with open(os.path.join(path, HEADER_FILE)) as f:
+        header = json.load(f)
+
+    session: Dict[str, object] = {'header': header}
+    for stream, info in header['streams'].items():
+        # JSON convierte las tuplas del descr (incluida la forma) en listas
+        dtype = np.dtype([
+            (field[0], field[1]) + ((tuple(field[2]),) if len(field) > 2 else ())
+            for field in info['dtype']
+        ])
+        file_path = os.path.join(path, info['file'])
+        n_records = os.path.getsize(file_path) // dtype.itemsize
+        session[stream] = (
+            np.memmap(file_path, dtype=dtype, mode='r', shape=(n_records,))
+            if n_records else np.empty(0, dtype=dtype)
+        )
+    return session
+
+
+def session_window(records: np.ndarray, t0: float, t1: float) -> np.ndarray:
+    """Registros de un flujo con tiempo en ``[t0, t1]``; sobre un memmap solo se leen esas filas"""
+    start, stop = sorted_range(records['time'], t0, t1)
+    return records[start:stop]
+
+
+def session_nearest(records: np.ndarray, t: float) -> Optional[np.ndarray]:
+    index = sorted_nearest(records['time'], t)
+    return records[index] if index is not None else None
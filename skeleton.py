@@ -0,0 +1,179 @@
+#skeleton.py
+import hashlib
+import json
+import numpy as np
+from landmarks import LandmarkFrame, GROUP_SLICES, LANDMARK_GROUPS, N_LANDMARKS
+
+# Segmentos del cuerpo que dibuja el cliente, en índices de la pose de MediaPipe
+BODY_CONNECTIONS = [
+    (11, 12), (11, 23), (12, 24), (23, 24),  # Torso
+    (11, 13), (13, 15), (12, 14), (14, 16),  # Brazos
+    (23, 25), (24, 26), (25, 27), (26, 28),  # Legs
+    (27, 31), (28, 32), (31, 29), (32, 30),  # Feet
+]
+
+# Grafo de 21 puntos de la mano; igual a mediapipe.solutions.holistic.HAND_CONNECTIONS
+HAND_CONNECTIONS = frozenset([
+    (0, 1), (1, 2), (2, 3), (3, 4),  # Pulgar
+    (0, 5), (5, 6), (6, 7), (7, 8),  # Índice
+    (5, 9), (9, 10), (10, 11), (11, 12),  # Medio
+    (9, 13), (13, 14), (14, 15), (15, 16),  # Anular
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),  # Meñique y palma
+])
+
+
+def build_connections():
+    """Construye la lista de conexiones del cuerpo y las manos"""
+    connections = [
+        [f"pose_{start}", f"pose_{end}", "body"]
+        for start, end in BODY_CONNECTIONS
+    ]
+    connections.extend([
+        [f"{side}_hand_{start}", f"{side}_hand_{end}", "hand"]
+        for side in ['left', 'right']
+        for start, end in sorted(HAND_CONNECTIONS)
+    ])
+    return connections
+
+
+# La topología del esqueleto es estática: se arma una vez, sin cargar MediaPipe, y se versiona
+CONNECTIONS = build_connections()
+TOPOLOGY_VERSION = hashlib.sha1(json.dumps(CONNECTIONS).encode()).hexdigest()[:12]
+
+
+def get_topology():
+    """Topología versionada que el cliente recibe una sola vez"""
+    return {'version': TOPOLOGY_VERSION, 'connections': CONNECTIONS}
+
+
+class LandmarkNormalizer:
+    """Pasa landmarks normalizados de MediaPipe al LandmarkFrame del análisis y fusiona cámaras.
+
+    No carga MediaPipe: lo usan tanto el extractor del servidor
+    (MultiCameraHolisticBiomechanics) como los lotes que llegan del navegador.
+    La pose se centra en hombros y caderas y se escala a ``height``; manos y
+    cara se recolocan sobre la muñeca / nariz.
+    """
+
+    def __init__(self, height=1.62):
+        self.height = height
+        self.scale_factor = height / 1.7
+        self.enabled_groups = frozenset(LANDMARK_GROUPS)
+        self.enabled_rows = np.ones(N_LANDMARKS, dtype=bool)
+
+        # Manos y cara se fusionan como offsets respecto a su punto base y se
+        # recolocan sobre la muñeca / nariz fusionadas: (grupo, referencia de pose, base)
+        self.rebased_groups = [('left_hand', 15, 0), ('right_hand', 16, 0), ('face', 0, 1)]
+        self.fusion_base, self.fusion_reference, self.fusion_rebased = self._fusion_tables()
+        self.exclude_points = list(range(1, 11))
+        self.exclude_points.extend([17, 18, 19, 20, 21, 22])
+        self.pose_keep = np.ones(33, dtype=bool)
+        self.pose_keep[self.exclude_points] = False
+
+    def set_enabled_groups(self, groups):
+        """Limita la extracción y la fusión a los grupos suscritos (la pose siempre se procesa)"""
+        self.enabled_groups = frozenset(groups) | {'pose'}
+        self.enabled_rows = np.zeros(N_LANDMARKS, dtype=bool)
+        for group in self.enabled_groups:
+            self.enabled_rows[GROUP_SLICES[group]] = True
+
+    def landmarks_from_arrays(self, pose, group_points, groups=None):
+        """Arma el LandmarkFrame a partir de landmarks normalizados de MediaPipe ya en arreglos.
+
+        ``pose`` es ``(33, 4)`` (x, y, z, visibilidad) y ``group_points`` mapea
+        'left_hand', 'right_hand' y 'face' a sus arreglos ``(n, >=3)``; los
+        grupos ausentes o con puntos no finitos se omiten. Sirve igual para el
+        resultado de Holistic en el servidor que para landmarks calculados en el navegador.
+        """
+        if pose is None or not np.isfinite(pose[:, :3]).all():
+            return None
+
+        enabled_groups = self.enabled_groups if groups is None else self.enabled_groups & groups
+
+        frame = LandmarkFrame.empty()
+        data = frame.data
+        pose_slice = GROUP_SLICES['pose']
+
+        # Procesar pose: centrar en el punto de anclaje (hombros y caderas), escalar e invertir Y
+        anchor_point = pose[[11, 12, 23, 24], :3].mean(axis=0)
+        pose_coords = (pose[:, :3] - anchor_point) * self.scale_factor
+        pose_coords[:, 1] *= -1
+
+        pose_data = data[pose_slice]
+        pose_data[self.pose_keep, :3] = pose_coords[self.pose_keep]
+        pose_data[self.pose_keep, 3] = np.nan_to_num(pose[self.pose_keep, 3])
+        frame.present[pose_slice] = self.pose_keep
+        frame.bounds = np.concatenate([pose[:, :2].min(axis=0), pose[:, :2].max(axis=0)]).astype(np.float32)
+
+        # Manos y cara: offsets relativos a su punto base aplicados sobre la muñeca / nariz
+        for group, reference_idx, base_idx in self.rebased_groups:
+            points = group_points.get(group)
+            if group not in enabled_groups or points is None or not self.pose_keep[reference_idx]:
+                continue
+            if not np.isfinite(points[:, :3]).all():
+                continue
+            rel_pos = points[:, :3] - points[base_idx, :3]
+            rel_pos[:, 1] *= -1  # Invertir Y como en el cuerpo
+
+            group_slice = GROUP_SLICES[group]
+            data[group_slice, :3] = pose_coords[reference_idx] + rel_pos
+            data[group_slice, 3] = 1.0
+            frame.present[group_slice] = True
+
+        return frame
+
+    def _fusion_tables(self):
+        """Tablas por landmark: fila base del grupo, fila de referencia en la pose y si se re-basa"""
+        rows = np.arange(N_LANDMARKS)
+        base = rows.copy()
+        reference = rows.copy()
+        rebased = np.zeros(N_LANDMARKS, dtype=bool)
+        pose_start = GROUP_SLICES['pose'].start
+        for group, reference_idx, base_offset in self.rebased_groups:
+            group_slice = GROUP_SLICES[group]
+            base[group_slice] = group_slice.start + base_offset
+            reference[group_slice] = pose_start + reference_idx
+            rebased[group_slice] = True
+        return base, reference, rebased
+
+    def merge_landmarks(self, all_landmarks):
+        """Fusiona los frames de varias cámaras con un promedio ponderado por visibilidad.
+
+        La pose se promedia directamente; manos y cara se promedian como offsets
+        respecto a su punto base y se recolocan sobre la muñeca / nariz fusionadas.
+        Un landmark que una cámara no detectó no aporta peso en esa cámara.
+        """
+        if not all_landmarks:
+            return None
+
+        frames = list(all_landmarks.values())
+        if len(frames) == 1:
+            return frames[0]
+
+        data = np.stack([frame.data for frame in frames])        # (n_cameras, n_landmarks, 4)
+        present = np.stack([frame.present for frame in frames])  # (n_cameras, n_landmarks)
+
+        # Un punto re-basado solo es válido si la cámara también vio la base de su grupo
+        valid = present & present[:, self.fusion_base] & self.enabled_rows
+        coords = data[..., :3] - data[:, self.fusion_base, :3] * self.fusion_rebased[:, None]
+
+        # Manos y cara no traen visibilidad por punto: pesan por presencia (columna = 1.0)
+        weights = np.where(valid, np.maximum(data[..., 3], 1e-3), 0.0)
+        weight_sum = weights.sum(axis=0)
+        fused_valid = weight_sum > 0
+
+        fused = np.einsum('cn,cnk->nk', weights, coords)
+        fused[fused_valid] /= weight_sum[fused_valid, None]
+
+        # Recolocar manos y cara sobre la muñeca / nariz fusionadas
+        fused += fused[self.fusion_reference] * self.fusion_rebased[:, None]
+        fused_valid &= ~self.fusion_rebased | fused_valid[self.fusion_reference]
+
+        merged = LandmarkFrame.empty()
+        merged.present[:] = fused_valid
+        merged.data[fused_valid, :3] = fused[fused_valid]
+        valid_count = valid.sum(axis=0)
+        merged.data[fused_valid, 3] = (
+            np.where(valid, data[..., 3], 0.0).sum(axis=0)[fused_valid] / valid_count[fused_valid]
+        )
+        return merged
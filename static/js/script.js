@@ -2,56 +2,39 @@
 let chartA0, chartA1, chartFFTA0, chartFFTA1;
 let dataA0 = [], dataA1 = [];
 let envelopeA0 = [], envelopeA1 = [];
-let fftDataA0 = [], fftDataA1 = [];
 let maxDataPoints = 1000;
 let isRunning = true;
 let socket;
 let maxTime = 15;
-let startTime = Date.now();
-let windowSize = 50; // Tamaño de la ventana para el cálculo RMS
-let fftSize = 512; // Tamaño de la FFT
-let samplingRate = 1000; // Frecuencia de muestreo en Hz (ajusta según tu Arduino)
-
-
-function calculateRMS(data, windowSize) {
-    if (data.length < windowSize) return 0;
-    const slice = data.slice(-windowSize);
-    const sum = slice.reduce((acc, val) => acc + val.y * val.y, 0);
-    return Math.sqrt(sum / windowSize);
+// La adquisición, la envolvente RMS, el espectro de Welch y la tendencia de fatiga se calculan en el
+// servidor (emg_acquisition.py, emg_features.py)
+// y llegan en bloques de varias muestras con el evento emg_data
+
+function updateSpectrum(chart, block, channel, name) {
+    const spectrum = block.frequencies.map((freq, i) => ({ x: freq, y: block.spectrum[channel][i] }));
+    const medianFreq = block.median_frequency[channel];
+    chart.options.plugins.annotation.annotations.medianLine.xMin = medianFreq;
+    chart.options.plugins.annotation.annotations.medianLine.xMax = medianFreq;
+    document.getElementById(`medianFreq${name}`).textContent = medianFreq.toFixed(2);
+    document.getElementById(`fatigueSlope${name}`).textContent = (block.fatigue_slope[channel] * 60).toFixed(1);
+    document.getElementById(`fatigueIndex${name}`).textContent = (block.fatigue_index[channel] * 100).toFixed(0);
+    chart.data.datasets[0].data = spectrum;
+    chart.update('none');
 }
 
-function calculateFFT(data) {
-    let fft = new FFT(fftSize, samplingRate);
-    let signal = new Float32Array(fftSize);
-    
-    // Rellenar con los últimos 5 segundos de datos o ceros si no hay suficientes
-    const startIndex = Math.max(0, data.length - samplingRate * 5);
-    for (let i = 0; i < fftSize; i++) {
-        signal[i] = i < data.length - startIndex ? data[i + startIndex].y : 0;
+function appendChannel(data, envelope, block, channel) {
+    const samples = block.samples[channel];
+    const rms = block.envelope[channel];
+    for (let i = 0; i < samples.length; i++) {
+        const t = block.t0 + i / block.sample_rate;
+        data.push({ x: t, y: samples[i] });
+        envelope.push({ x: t, y: rms[i] });
     }
-
-    fft.forward(signal);
-
-    let spectrum = new Array(fftSize / 2);
-    for (let i = 0; i < fftSize / 2; i++) {
-        let freq = i * samplingRate / fftSize;
-        let mag = fft.spectrum[i];
-        spectrum[i] = { x: freq, y: mag };
+    // Mantener solo los últimos maxDataPoints
+    if (data.length > maxDataPoints) {
+        data.splice(0, data.length - maxDataPoints);
+        envelope.splice(0, envelope.length - maxDataPoints);
     }
-
-    return spectrum;
-}
-
-function calculateMedianFrequency(spectrum) {
-    let totalPower = spectrum.reduce((sum, point) => sum + point.y, 0);
-    let cumulativePower = 0;
-    for (let point of spectrum) {
-        cumulativePower += point.y;
-        if (cumulativePower >= totalPower / 2) {
-            return point.x;
-        }
-    }
-    return 0;
 }
 
 document.addEventListener('DOMContentLoaded', () => {
@@ -213,7 +196,7 @@ document.addEventListener('DOMContentLoaded', () => {
         data: {
             datasets: [{
                 label: 'Espectro de Potencia A0',
-                data: fftDataA0,
+                data: [],
                 borderColor: 'blue',
                 tension: 0.1
             }]
@@ -226,7 +209,7 @@ document.addEventListener('DOMContentLoaded', () => {
         data: {
             datasets: [{
                 label: 'Espectro de Potencia A1',
-                data: fftDataA1,
+                data: [],
                 borderColor: 'red',
                 tension: 0.1
             }]
@@ -238,61 +221,29 @@ document.addEventListener('DOMContentLoaded', () => {
 
     socket = io();
 
-    socket.on('arduinoData', (data) => {
-        if (!isRunning) return;
-
-        const [valueA0, valueA1] = data.split(',').map(Number);
-        const currentTime = (Date.now() - startTime) / 1000;
-
-        if (document.getElementById('channelA0Checkbox').checked) {
-            dataA0.push({ x: currentTime, y: valueA0 });
-            const rmsA0 = calculateRMS(dataA0, windowSize);
-            envelopeA0.push({ x: currentTime, y: rmsA0 });
-
-            if (dataA0.length % 100 === 0) {  // Actualizar FFT cada 100 muestras
-                fftDataA0 = calculateFFT(dataA0);
-                const medianFreqA0 = calculateMedianFrequency(fftDataA0);
-                chartFFTA0.options.plugins.annotation.annotations.medianLine.xMin = medianFreqA0;
-                chartFFTA0.options.plugins.annotation.annotations.medianLine.xMax = medianFreqA0;
-                document.getElementById('medianFreqA0').textContent = medianFreqA0.toFixed(2);
-                chartFFTA0.data.datasets[0].data = fftDataA0;
-                chartFFTA0.update('none');
-            }
-        }
-
-
-        if (document.getElementById('channelA1Checkbox').checked) {
-            dataA1.push({ x: currentTime, y: valueA1 });
-            const rmsA1 = calculateRMS(dataA1, windowSize);
-            envelopeA1.push({ x: currentTime, y: rmsA1 });
+    socket.on('connect', () => {
+        if (isRunning) socket.emit('subscribe_emg');
+    });
 
-            if (dataA1.length % 100 === 0) {  // Actualizar FFT cada 100 muestras
-                fftDataA1 = calculateFFT(dataA1);
-                const medianFreqA1 = calculateMedianFrequency(fftDataA1);
-                chartFFTA1.options.plugins.annotation.annotations.medianLine.xMin = medianFreqA1;
-                chartFFTA1.options.plugins.annotation.annotations.medianLine.xMax = medianFreqA1;
-                document.getElementById('medianFreqA1').textContent = medianFreqA1.toFixed(2);
-                chartFFTA1.data.datasets[0].data = fftDataA1;
-                chartFFTA1.update('none');
-            }
+    socket.on('emg_error', (data) => {
+        console.error('EMG:', data.error);
+    });
 
+    socket.on('emg_data', (block) => {
+        if (!isRunning) return;
 
+        if (document.getElementById('channelA0Checkbox').checked) {
+            appendChannel(dataA0, envelopeA0, block, 0);
+            updateSpectrum(chartFFTA0, block, 0, 'A0');
         }
 
-
-
-
-        // Mantener solo los últimos maxDataPoints
-        if (dataA0.length > maxDataPoints) {
-            dataA0.shift();
-            envelopeA0.shift();
-        }
-        if (dataA1.length > maxDataPoints) {
-            dataA1.shift();
-            envelopeA1.shift();
+        if (document.getElementById('channelA1Checkbox').checked && block.samples.length > 1) {
+            appendChannel(dataA1, envelopeA1, block, 1);
+            updateSpectrum(chartFFTA1, block, 1, 'A1');
         }
 
         // Actualizar los límites del eje x
+        const currentTime = block.t0 + block.samples[0].length / block.sample_rate;
         const newMin = Math.max(0, currentTime - maxTime);
         const newMax = currentTime;
 
@@ -308,13 +259,15 @@ document.addEventListener('DOMContentLoaded', () => {
 
 function startDataCollection() {
     isRunning = true;
-    startTime = Date.now();
-    dataA0 = [];
-    dataA1 = [];
-    envelopeA0 = [];
-    envelopeA1 = [];
+    // Vaciar en el lugar: los gráficos guardan referencias a estos arreglos
+    dataA0.length = 0;
+    dataA1.length = 0;
+    envelopeA0.length = 0;
+    envelopeA1.length = 0;
+    socket.emit('subscribe_emg');
 }
 
 function stopDataCollection() {
     isRunning = false;
-}
\ No newline at end of file
+    socket.emit('unsubscribe_emg');
+}
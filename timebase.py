@@ -0,0 +1,116 @@
+#timebase.py
+import bisect
+import numpy as np
+from time import monotonic, time
+from typing import Optional, Tuple
+
+
+class Timebase:
+    """Reloj monotónico común a cámaras, EMG y análisis.
+
+    Todos los tiempos son segundos desde ``origin`` (un instante de
+    ``time.monotonic``), así que un frame sellado en la captura y un bloque de
+    EMG sellado en la adquisición quedan en la misma escala sin depender del
+    reloj de pared. ``wall_origin`` permite pasar a hora de pared al exportar.
+    """
+
+    def __init__(self):
+        self.origin = monotonic()
+        self.wall_origin = time()
+
+    def now(self) -> float:
+        return monotonic() - self.origin
+
+    def from_monotonic(self, stamp: float) -> float:
+        """Convierte un valor de ``time.monotonic()`` tomado en este proceso"""
+        return stamp - self.origin
+
+    def to_wall(self, t: float) -> float:
+        return self.wall_origin + t
+
+
+# Reloj del proceso; los módulos lo importan en lugar de crear el suyo
+CLOCK = Timebase()
+
+
+class RemoteClock:
+    """Traduce los tiempos de un cliente (p. ej. ``performance.now()`` en ms) al reloj común.
+
+    Cada lote observado da una cota del desfase: ``llegada - tiempo remoto``
+    incluye la demora de red, así que el menor desfase visto corresponde al
+    envío más rápido y es la mejor estimación. Para seguir una deriva lenta
+    entre los relojes, la estimación puede subir a lo sumo ``drift`` segundos
+    por segundo.
+    """
+
+    def __init__(self, scale: float = 0.001, drift: float = 1e-4):
+        self.scale = scale
+        self.drift = drift
+        self.offset: Optional[float] = None
+        self._observed_at = 0.0
+
+    def observe(self, remote_t: float, received_at: Optional[float] = None):
+        received_at = CLOCK.now() if received_at is None else received_at
+        offset = received_at - remote_t * self.scale
+        if self.offset is None:
+            self.offset = offset
+        else:
+            allowed = self.offset + self.drift * (received_at - self._observed_at)
+            self.offset = min(offset, allowed)
+        self._observed_at = received_at
+
+    def to_local(self, remote_t):
+        """Tiempo (o arreglo de tiempos) remoto en segundos del reloj común"""
+        return remote_t * self.scale + (self.offset or 0.0)
+
+
+class _RingTimes:
+    """Vista cronológica de un anillo de tiempos, indexable como secuencia para bisect"""
+
+    def __init__(self, times: np.ndarray, head: int, count: int):
+        self.times = times
+        self.start = head - count
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> float:
+        return self.times[(self.start + index) % len(self.times)]
+
+
+def ring_bisect(times: np.ndarray, head: int, count: int, t: float, right: bool = False) -> int:
+    """Posición cronológica donde ``t`` entraría en el anillo (tiempos crecientes), en O(log n)"""
+    view = _RingTimes(times, head, count)
+    return bisect.bisect_right(view, t) if right else bisect.bisect_left(view, t)
+
+
+def ring_range(times: np.ndarray, head: int, count: int, t0: float, t1: float) -> np.ndarray:
+    """Posiciones del anillo con tiempo en ``[t0, t1]``, en orden cronológico"""
+    first = ring_bisect(times, head, count, t0)
+    last = ring_bisect(times, head, count, t1, right=True)
+    return (head - count + np.arange(first, last)) % len(times)
+
+
+def ring_nearest(times: np.ndarray, head: int, count: int, t: float) -> Optional[int]:
+    """Posición del anillo con el tiempo más cercano a ``t``, o None si está vacío"""
+    if not count:
+        return None
+    index = ring_bisect(times, head, count, t)
+    candidates = [i for i in (index - 1, index) if 0 <= i < count]
+    view = _RingTimes(times, head, count)
+    best = min(candidates, key=lambda i: abs(view[i] - t))
+    return (head - count + best) % len(times)
+
+
+def sorted_range(times: np.ndarray, t0: float, t1: float) -> Tuple[int, int]:
+    """``(inicio, fin)`` de los registros con tiempo en ``[t0, t1]`` de un arreglo ordenado (p. ej. un memmap)"""
+    return int(np.searchsorted(times, t0, 'left')), int(np.searchsorted(times, t1, 'right'))
+
+
+def sorted_nearest(times: np.ndarray, t: float) -> Optional[int]:
+    if not len(times):
+        return None
+    index = int(np.searchsorted(times, t))
+    candidates = [i for i in (index - 1, index) if 0 <= i < len(times)]
+    return min(candidates, key=lambda i: abs(times[i] - t))
@@ -0,0 +1,195 @@
+#video_broadcast.py
+import threading
+import numpy as np
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+from camera_pipeline import LatestSlot
+
+DEFAULT_JPEG_QUALITY = 80
+MIN_STREAM_FPS = 2.0
+NOMINAL_STREAM_FPS = 30.0
+
+
+@dataclass(frozen=True)
+class StreamSettings:
+    """Calidad JPEG, factor de escala y tasa máxima de un stream MJPEG"""
+    quality: int = DEFAULT_JPEG_QUALITY
+    scale: float = 1.0
+    max_fps: Optional[float] = None
+    adaptive: bool = True
+
+    @property
+    def key(self) -> Tuple[int, float]:
+        return self.quality, self.scale
+
+    @classmethod
+    def from_args(cls, args) -> 'StreamSettings':
+        """Lee ``preset``, ``quality``, ``scale``, ``fps`` y ``adaptive`` de los parámetros de la URL"""
+        settings = VIDEO_PRESETS.get(args.get('preset', 'high'), VIDEO_PRESETS['high'])
+        quality = args.get('quality', type=int)
+        scale = args.get('scale', type=float)
+        max_fps = args.get('fps', type=float)
+        adaptive = args.get('adaptive', '1') not in ('0', 'false', 'no')
+        return replace(
+            settings,
+            quality=int(np.clip(quality, 10, 100)) if quality is not None else settings.quality,
+            # La escala se redondea para que los visores con valores parecidos compartan codificación
+            scale=round(float(np.clip(scale, 0.1, 1.0)), 2) if scale is not None else settings.scale,
+            max_fps=max(max_fps, MIN_STREAM_FPS) if max_fps else settings.max_fps,
+            adaptive=adaptive
+        )
+
+
+# Escalera de calidad, de mayor a menor
+VIDEO_PRESETS = {
+    'high': StreamSettings(quality=DEFAULT_JPEG_QUALITY, scale=1.0),
+    'medium': StreamSettings(quality=70, scale=0.75),
+    'low': StreamSettings(quality=60, scale=0.5),
+    'minimal': StreamSettings(quality=45, scale=0.35),
+}
+
+
+class VideoHub:
+    """Reparte los frames procesados de una cámara entre todos sus visores MJPEG.
+
+    La captura y la inferencia ocurren una sola vez por frame en el
+    CameraPipeline; el hub codifica cada frame a JPEG como mucho una vez por
+    nivel de calidad (``StreamSettings.key``) y todos los visores de ese nivel comparten los bytes. Cada
+    visor pide siempre el frame más reciente, así que uno lento salta frames
+    en lugar de frenar al productor o a los demás visores.
+    """
+
+    def __init__(self, camera_id, results: LatestSlot):
+        self.camera_id = camera_id
+        self.results = results
+        self.viewers = 0
+        self.encoded = 0
+        self._cache: Dict[Tuple[int, float], Tuple[int, bytes]] = {}
+        self._locks: Dict[Tuple[int, float], threading.Lock] = {}
+        self._buffers: Dict[Tuple[int, float], np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def add_viewer(self):
+        with self._lock:
+            self.viewers += 1
+
+    def remove_viewer(self):
+        with self._lock:
+            self.viewers -= 1
+
+    def _encode_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _resize(self, image, settings: StreamSettings):
+        import cv2
+
+        if settings.scale >= 1.0:
+            return image
+        height, width = image.shape[:2]
+        size = (max(1, int(width * settings.scale)), max(1, int(height * settings.scale)))
+        # Un buffer de destino por nivel: cv2.resize lo reutiliza en cada frame
+        buffer = self._buffers.get(settings.key)
+        if buffer is None or buffer.shape[:2] != (size[1], size[0]) or buffer.shape[2:] != image.shape[2:]:
+            buffer = np.empty((size[1], size[0]) + image.shape[2:], dtype=image.dtype)
+            self._buffers[settings.key] = buffer
+        return cv2.resize(image, size, dst=buffer, interpolation=cv2.INTER_AREA)
+
+    def jpeg(self, seq: int, image, settings: StreamSettings = StreamSettings()) -> Optional[bytes]:
+        """JPEG del frame ``seq``; el primer visor de cada nivel lo codifica y el resto lo reutiliza"""
+        import cv2
+
+        key = settings.key
+        with self._encode_lock(key):
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == seq:
+                return cached[1]
+            ret, buffer = cv2.imencode('.jpg', self._resize(image, settings),
+                                       [cv2.IMWRITE_JPEG_QUALITY, settings.quality])
+            if not ret:
+                return None
+            data = buffer.tobytes()
+            self._cache[key] = (seq, data)
+            self.encoded += 1
+            return data
+
+    def next_frame(self, after_seq: int, settings: StreamSettings = StreamSettings(),
+                   timeout: float = 1.0) -> Tuple[int, Optional[bytes]]:
+        """Espera un frame más nuevo que ``after_seq`` y devuelve ``(seq, jpeg)``; ``jpeg`` es None si no llegó"""
+        seq, processed = self.results.wait_newer(after_seq, timeout)
+        if seq <= after_seq or processed is None:
+            return after_seq, None
+        return seq, self.jpeg(seq, processed.image, settings)
+
+    def stats(self) -> dict:
+        return {'viewers': self.viewers, 'encoded': self.encoded}
+
+
+class AdaptiveStream:
+    """Nivel actual de un visor dentro de la escalera de calidad.
+
+    Parte de la configuración pedida; si enviar frames tarda más que el
+    intervalo entre frames varias veces seguidas (la conexión se atrasa), baja
+    un escalón de calidad/resolución y, al llegar al último, reduce a la mitad
+    la tasa. Cuando los envíos vuelven a ser holgados, deshace los cambios en
+    orden inverso.
+    """
+
+    SLOW_SENDS = 3
+    FAST_SENDS = 60
+
+    def __init__(self, requested: StreamSettings):
+        self.requested = requested
+        self.ladder: List[StreamSettings] = [requested]
+        if requested.adaptive:
+            self.ladder.extend(
+                replace(requested, quality=min(preset.quality, requested.quality),
+                        scale=min(preset.scale, requested.scale))
+                for preset in VIDEO_PRESETS.values()
+                if preset.quality < requested.quality or preset.scale < requested.scale
+            )
+        self.level = 0
+        self.fps = requested.max_fps
+        self._slow = 0
+        self._fast = 0
+
+    @property
+    def settings(self) -> StreamSettings:
+        return self.ladder[self.level]
+
+    @property
+    def interval(self) -> float:
+        return 1.0 / (self.fps or NOMINAL_STREAM_FPS)
+
+    def record_send(self, elapsed: float):
+        """Registra cuánto tardó en salir un frame y ajusta el nivel si hace falta"""
+        if not self.requested.adaptive:
+            return
+        if elapsed > self.interval:
+            self._slow += 1
+            self._fast = 0
+            if self._slow >= self.SLOW_SENDS:
+                self._slow = 0
+                self._step_down()
+        elif elapsed < self.interval / 2:
+            self._fast += 1
+            self._slow = 0
+            if self._fast >= self.FAST_SENDS:
+                self._fast = 0
+                self._step_up()
+
+    def _step_down(self):
+        if self.level < len(self.ladder) - 1:
+            self.level += 1
+        else:
+            self.fps = max(MIN_STREAM_FPS, (self.fps or NOMINAL_STREAM_FPS) / 2)
+
+    def _step_up(self):
+        if self.fps != self.requested.max_fps:
+            self.fps = self.fps * 2
+            if self.requested.max_fps is None and self.fps >= NOMINAL_STREAM_FPS:
+                self.fps = None
+            elif self.requested.max_fps is not None:
+                self.fps = min(self.fps, self.requested.max_fps)
+        elif self.level > 0:
+            self.level -= 1
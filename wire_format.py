@@ -0,0 +1,143 @@
+#wire_format.py
+import struct
+import numpy as np
+from typing import Optional
+from landmarks import LandmarkFrame, N_LANDMARKS
+
+WIRE_FORMAT_VERSION = 1
+COORDINATE_SCALE = 1e-4  # unidades por paso de int16 (rango ±3.27)
+KEYFRAME_INTERVAL = 30
+
+FLAG_DELTA = 0x01    # coordenadas como diferencia respecto al frame anterior
+FLAG_INT8 = 0x02     # diferencias empaquetadas en int8 en lugar de int16
+FLAG_ANGLES = 0x04   # incluye ángulos, velocidades y aceleraciones
+FLAG_PREDICTED = 0x08  # landmarks extrapolados, no inferidos
+
+# version, flags, n_points, n_joints, sequence, scale (+2 bytes de relleno -> 16)
+HEADER = struct.Struct('<BBHHIf2x')
+MASK_BYTES = (N_LANDMARKS + 7) // 8
+
+
+def _pad4(n: int) -> int:
+    return (n + 3) & ~3
+
+
+class FrameEncoder:
+    """Codifica LandmarkFrames y cinemática en un paquete binario compacto.
+
+    Estructura (little-endian, cada bloque alineado a 4 bytes)::
+
+        header   16 bytes (HEADER)
+        mask     máscara de presencia empaquetada, 543 bits
+        coords   (n_points, 3) int16 cuantizado con ``scale``; en frames delta,
+                 diferencias int16 o int8 respecto al frame anterior
+        angles   (3, n_joints, 3) float32: ángulos, velocidades, aceleraciones
+
+    Con ``delta=True`` se envía un frame completo cada ``keyframe_interval``
+    frames o cuando cambia la máscara; el decodificador descarta los deltas
+    hasta recibir un frame completo si pierde alguno.
+    """
+
+    def __init__(self, delta: bool = False, scale: float = COORDINATE_SCALE,
+                 keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.delta = delta
+        self.scale = scale
+        self.keyframe_interval = keyframe_interval
+        self.sequence = 0
+        self._prev_present: Optional[np.ndarray] = None
+        self._prev_quantized: Optional[np.ndarray] = None
+        self._since_keyframe = 0
+
+    def encode(self, frame: Optional[LandmarkFrame], kinematics: Optional[np.ndarray] = None,
+               predicted: bool = False) -> bytes:
+        """Codifica un frame; ``frame=None`` envía solo la cinemática (máscara vacía)"""
+        if frame is None:
+            present = np.zeros(N_LANDMARKS, dtype=bool)
+            quantized = np.zeros((0, 3), dtype=np.int16)
+        else:
+            present = frame.present
+            quantized = np.clip(
+                np.rint(frame.data[present, :3] / self.scale), -32767, 32767
+            ).astype(np.int16)
+
+        flags = 0
+        coords = quantized
+        if (self.delta and self._prev_present is not None
+                and self._since_keyframe < self.keyframe_interval
+                and np.array_equal(present, self._prev_present)):
+            diff = quantized.astype(np.int32) - self._prev_quantized
+            if np.abs(diff).max(initial=0) <= 127:
+                flags |= FLAG_DELTA | FLAG_INT8
+                coords = diff.astype(np.int8)
+            elif np.abs(diff).max() <= 32767:
+                flags |= FLAG_DELTA
+                coords = diff.astype(np.int16)
+
+        if flags & FLAG_DELTA:
+            self._since_keyframe += 1
+        else:
+            self._since_keyframe = 0
+        self._prev_present = present.copy()
+        self._prev_quantized = quantized.astype(np.int32)
+
+        if predicted:
+            flags |= FLAG_PREDICTED
+
+        n_joints = 0
+        angles = b''
+        if kinematics is not None:
+            flags |= FLAG_ANGLES
+            n_joints = kinematics.shape[1]
+            angles = np.ascontiguousarray(kinematics, dtype='<f4').tobytes()
+
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        mask = np.packbits(present, bitorder='little').tobytes()
+        coord_bytes = coords.astype(coords.dtype.newbyteorder('<'), copy=False).tobytes()
+
+        return b''.join([
+            HEADER.pack(WIRE_FORMAT_VERSION, flags, int(present.sum()), n_joints, self.sequence, self.scale),
+            mask, b'\0' * (_pad4(MASK_BYTES) - MASK_BYTES),
+            coord_bytes, b'\0' * (_pad4(len(coord_bytes)) - len(coord_bytes)),
+            angles,
+        ])
+
+
+class DataUpdate:
+    """Un frame listo para emitir a una sala; cada codificación se calcula una sola vez y solo si se usa.
+
+    ``frame`` o ``angles``/``kinematics`` pueden faltar según el tipo de dato de
+    la sala (landmarks crudos de una cámara, solo ángulos, ...). ``predicted``
+    toma por defecto la marca del frame. ``extra`` se agrega tal cual al payload JSON.
+    """
+
+    def __init__(self, frame: Optional[LandmarkFrame], angles: Optional[dict],
+                 kinematics: Optional[np.ndarray], topology_version: str,
+                 predicted: Optional[bool] = None, **extra):
+        self.frame = frame
+        self.predicted = bool(frame is not None and frame.predicted) if predicted is None else predicted
+        self.angles = angles
+        self.kinematics = kinematics
+        self.topology_version = topology_version
+        self.extra = extra
+        self._json = None
+        self._binary = {}
+
+    def json(self) -> dict:
+        if self._json is None:
+            payload = dict(self.extra)
+            if self.frame is not None:
+                payload['landmarks'] = self.frame.to_dict()
+                payload['topology_version'] = self.topology_version
+                if self.frame.timestamp is not None:
+                    payload['time'] = self.frame.timestamp
+            if self.angles is not None:
+                payload['angles'] = self.angles
+            payload['predicted'] = self.predicted
+            self._json = payload
+        return self._json
+
+    def binary(self, encoder: FrameEncoder) -> bytes:
+        key = id(encoder)
+        if key not in self._binary:
+            self._binary[key] = encoder.encode(self.frame, self.kinematics, self.predicted)
+        return self._binary[key]